@@ -2,12 +2,94 @@
 
 /**
  * Analytics Bridge - Connects Python Analytics Agent with Node.js AnalyticsService
- * Usage: node analytics_bridge.js <method> <params_json>
+ * Usage:
+ *   node analytics_bridge.js <method> <params_json>   (one-shot call)
+ *   node analytics_bridge.js --serve                  (persistent worker)
+ *
+ * In --serve mode the bridge reads newline-delimited JSON-RPC requests
+ * ({"id", "method", "params"}) from stdin and writes one response line per
+ * request ({"id", "result"} or {"id", "error"}) to stdout. Requests are
+ * handled concurrently, so responses may arrive out of order. A
+ * {"cancel": <id>} line tells the bridge the caller has given up on that
+ * request; its response is then dropped instead of written.
  */
 
+const readline = require('readline');
 const AnalyticsService = require('./services/AnalyticsService');
 
-async function main() {
+async function dispatch(method, params = {}) {
+    switch (method) {
+        case 'ping':
+            return { success: true, pid: process.pid };
+
+        case 'recordTaskAssignment':
+            return AnalyticsService.recordTaskAssignment(
+                params.task_id,
+                params.user_id,
+                params.group_id,
+                params.category
+            );
+            
+        case 'recordTaskCompletion':
+            return AnalyticsService.recordTaskCompletion(
+                params.task_id,
+                params.success
+            );
+            
+        case 'getCurrentWorkload':
+            return AnalyticsService.getCurrentWorkload(params.user_id);
+            
+        case 'getUserExpertise':
+            return AnalyticsService.getUserExpertise(params.user_id);
+            
+        case 'getHistoricalCapacity':
+            return AnalyticsService.getHistoricalCapacity(params.user_id);
+            
+        case 'getUserAnalyticsSummary': {
+            const summary = await AnalyticsService.getUserAnalyticsSummary(params.user_id);
+            return { success: true, analytics: summary };
+        }
+            
+        case 'getTeamAnalyticsSummary': {
+            const teamSummary = await AnalyticsService.getTeamAnalyticsSummary(params.group_id);
+            return { success: true, team_analytics: teamSummary };
+        }
+            
+        case 'getTeamAnalyticsBatch': {
+            const batch = await AnalyticsService.getTeamAnalyticsBatch(
+                params.group_id,
+                params.user_ids
+            );
+            return { success: true, ...batch };
+        }
+            
+        case 'getWorkloadDistribution': {
+            const workloadDist = await AnalyticsService.getWorkloadDistribution(params.group_id);
+            return { success: true, workload_distribution: workloadDist };
+        }
+            
+        case 'getCategoryExpertiseRankings': {
+            const expertiseRankings = await AnalyticsService.getCategoryExpertiseRankings(
+                params.group_id,
+                params.category
+            );
+            return { success: true, expertise_rankings: expertiseRankings };
+        }
+            
+        case 'getTeamMembers':
+            // This would need to be implemented in a separate service
+            // For now, return mock data or integrate with existing user service
+            return getTeamMembersFromDatabase(params.group_id);
+            
+        case 'getGroupsMembers':
+            return getGroupsMembersFromDatabase(params.group_ids);
+            
+        default:
+            return { success: false, error: `Unknown method: ${method}` };
+    }
+}
+
+async function runOnce() {
     try {
         const method = process.argv[2];
         const paramsJson = process.argv[3];
@@ -27,70 +109,7 @@ async function main() {
             }
         }
         
-        let result;
-        
-        switch (method) {
-            case 'recordTaskAssignment':
-                result = await AnalyticsService.recordTaskAssignment(
-                    params.task_id,
-                    params.user_id,
-                    params.group_id,
-                    params.category
-                );
-                break;
-                
-            case 'recordTaskCompletion':
-                result = await AnalyticsService.recordTaskCompletion(
-                    params.task_id,
-                    params.success
-                );
-                break;
-                
-            case 'getCurrentWorkload':
-                result = await AnalyticsService.getCurrentWorkload(params.user_id);
-                break;
-                
-            case 'getUserExpertise':
-                result = await AnalyticsService.getUserExpertise(params.user_id);
-                break;
-                
-            case 'getHistoricalCapacity':
-                result = await AnalyticsService.getHistoricalCapacity(params.user_id);
-                break;
-                
-            case 'getUserAnalyticsSummary':
-                const summary = await AnalyticsService.getUserAnalyticsSummary(params.user_id);
-                result = { success: true, analytics: summary };
-                break;
-                
-            case 'getTeamAnalyticsSummary':
-                const teamSummary = await AnalyticsService.getTeamAnalyticsSummary(params.group_id);
-                result = { success: true, team_analytics: teamSummary };
-                break;
-                
-            case 'getWorkloadDistribution':
-                const workloadDist = await AnalyticsService.getWorkloadDistribution(params.group_id);
-                result = { success: true, workload_distribution: workloadDist };
-                break;
-                
-            case 'getCategoryExpertiseRankings':
-                const expertiseRankings = await AnalyticsService.getCategoryExpertiseRankings(
-                    params.group_id,
-                    params.category
-                );
-                result = { success: true, expertise_rankings: expertiseRankings };
-                break;
-                
-            case 'getTeamMembers':
-                // This would need to be implemented in a separate service
-                // For now, return mock data or integrate with existing user service
-                result = await getTeamMembersFromDatabase(params.group_id);
-                break;
-                
-            default:
-                result = { success: false, error: `Unknown method: ${method}` };
-        }
-        
+        const result = await dispatch(method, params);
         console.log(JSON.stringify(result));
         
     } catch (error) {
@@ -103,6 +122,54 @@ async function main() {
     }
 }
 
+function serve() {
+    // stdout carries the protocol; route service logging to stderr
+    const writeResponse = (response) => process.stdout.write(JSON.stringify(response) + '\n');
+    console.log = (...args) => console.error(...args);
+
+    const rl = readline.createInterface({ input: process.stdin, terminal: false });
+    const inFlight = new Map();
+    let closing = false;
+
+    rl.on('line', async (line) => {
+        if (!line.trim()) return;
+
+        let request;
+        try {
+            request = JSON.parse(line);
+        } catch (e) {
+            writeResponse({ id: null, error: 'Invalid JSON request' });
+            return;
+        }
+
+        if (request.cancel !== undefined) {
+            const cancelled = inFlight.get(request.cancel);
+            if (cancelled) cancelled.cancelled = true;
+            return;
+        }
+
+        inFlight.set(request.id, { cancelled: false });
+        let response;
+        try {
+            const result = await dispatch(request.method, request.params || {});
+            response = { id: request.id, result };
+        } catch (error) {
+            response = { id: request.id, error: error.message };
+        } finally {
+            const cancelled = inFlight.get(request.id)?.cancelled;
+            inFlight.delete(request.id);
+            if (!cancelled) writeResponse(response);
+            if (closing && inFlight.size === 0) process.exit(0);
+        }
+    });
+
+    // Parent closed our stdin: finish what is in flight, then shut down
+    rl.on('close', () => {
+        closing = true;
+        if (inFlight.size === 0) process.exit(0);
+    });
+}
+
 async function getTeamMembersFromDatabase(groupId) {
     try {
         // This would integrate with the existing user/group service
@@ -142,5 +209,53 @@ async function getTeamMembersFromDatabase(groupId) {
     }
 }
 
-// Run the main function
-main();
\ No newline at end of file
+async function getGroupsMembersFromDatabase(groupIds) {
+    try {
+        const { execReadCommand } = require('./helpers/execQuery');
+        const { TYPES } = require('tedious');
+        
+        // One query for every requested group; omitting group_ids means all groups
+        const params = [];
+        let where = '';
+        if (groupIds && groupIds.length) {
+            const placeholders = groupIds.map((groupId, i) => {
+                params.push({ name: `gid${i}`, type: TYPES.UniqueIdentifier, value: groupId });
+                return `@gid${i}`;
+            });
+            where = `WHERE ug.gid IN (${placeholders.join(', ')})`;
+        }
+        
+        const query = `
+            SELECT ug.gid, u.uid, u.username
+            FROM dbo.UserGroups ug
+            JOIN dbo.Users u ON u.uid = ug.uid
+            ${where}
+            ORDER BY ug.gid, u.username
+        `;
+        
+        const results = await execReadCommand(query, params);
+        
+        return {
+            success: true,
+            memberships: results.map(row => ({
+                group_id: row.gid,
+                uid: row.uid,
+                username: row.username
+            }))
+        };
+        
+    } catch (error) {
+        console.error('Error getting group memberships:', error);
+        return {
+            success: false,
+            error: error.message,
+            memberships: []
+        };
+    }
+}
+
+if (process.argv[2] === '--serve') {
+    serve();
+} else {
+    runOnce();
+}
\ No newline at end of file
@@ -2,18 +2,50 @@ import json
 import sys
 import os
 import asyncio
-import subprocess
 import google.generativeai as genai
 
 # Add the parent directory to path to import services
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 
+import llm_scheduler
 import llm_service
+import recommendation_merge
+import scoring
+import prompts
+from analytics_bridge_client import AnalyticsBridge
+from ttl_cache import TTLCache
+
+# Bounds for per-member analytics lookups when no batch result is available
+MEMBER_LOOKUP_CONCURRENCY = int(os.getenv('ANALYTICS_MEMBER_CONCURRENCY', '8'))
+MEMBER_LOOKUP_TIMEOUT = float(os.getenv('ANALYTICS_MEMBER_TIMEOUT', '5'))
+
+# Membership and analytics change rarely; cache them between requests
+ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', '1024'))
+ANALYTICS_CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', '60'))
+TEAM_MEMBERS_CACHE_TTL = float(os.getenv('TEAM_MEMBERS_CACHE_TTL', '300'))
+# Past this, recommendations fall back to the deterministic base scores
+ANALYTICS_LLM_TIMEOUT = float(os.getenv('ANALYTICS_LLM_TIMEOUT', '8'))
+# Recommendations returned per request
+RECOMMENDATIONS_RETURNED = 3
+# Org-wide recommendations only send this many top candidates to the LLM
+ORG_SHORTLIST_SIZE = int(os.getenv('ORG_SHORTLIST_SIZE', '10'))
+# Members whose metrics go into the LLM prompt: the top-K by base score,
+# plus one development candidate (low expertise, spare capacity) from the rest
+LLM_SHORTLIST_SIZE = int(os.getenv('ANALYTICS_LLM_SHORTLIST', '5'))
+DEVELOPMENT_EXPERTISE_MAX = 50
+# Largest plan accepted by bulk_assignment_recommendations
+BULK_ASSIGNMENT_MAX_TASKS = int(os.getenv('BULK_ASSIGNMENT_MAX_TASKS', '200'))
+# Most user ids per bulk analytics query (SQL Server caps parameters at 2100)
+ANALYTICS_BATCH_MAX_USERS = int(os.getenv('ANALYTICS_BATCH_MAX_USERS', '500'))
 
 class AnalyticsAgent:
     def __init__(self):
         self.analytics_service = None
         self.use_real_analytics = True  # Temporarily disabled to use diverse mock data
+        self.bridge = AnalyticsBridge()
+        self.team_members_cache = TTLCache(ANALYTICS_CACHE_SIZE, TEAM_MEMBERS_CACHE_TTL)  # group_id -> members
+        self.user_analytics_cache = TTLCache(ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL)  # user_id -> analytics
+        self.group_analytics_cache = TTLCache(ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL)  # (group_id, method, params) -> result
         self._initialize_analytics_service()
     
     def _initialize_analytics_service(self):
@@ -28,12 +60,18 @@ class AnalyticsAgent:
 
     async def _get_team_members(self, group_id):
         """Get team members for a group - integrates with real database when possible"""
+        cached = self.team_members_cache.get(group_id)
+        if cached is not None:
+            return cached
+        
         try:
             if self.use_real_analytics:
                 # Call Node.js service to get real team members
                 result = await self._call_node_service('getTeamMembers', {'group_id': group_id})
                 if result and result.get('success'):
-                    return result.get('team_members', [])
+                    team_members = result.get('team_members', [])
+                    self.team_members_cache.set(group_id, team_members)
+                    return team_members
         except Exception as e:
             print(f"Failed to get real team members: {e}")
         
@@ -85,42 +123,167 @@ class AnalyticsAgent:
         return mock_team_members
     
     async def _call_node_service(self, method, params):
-        """Call Node.js AnalyticsService methods via subprocess"""
+        """Call Node.js AnalyticsService methods via the persistent bridge workers"""
         try:
-            # Create a simple Node.js script call
-            script_path = os.path.join(os.path.dirname(__file__), '../../analytics_bridge.js')
-            if not os.path.exists(script_path):
-                return None
-                
-            cmd = ['node', script_path, method, json.dumps(params)]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            else:
-                print(f"Node service error: {result.stderr}")
+            if not self.bridge.available:
                 return None
+            return await self.bridge.call(method, params)
+        except asyncio.TimeoutError:
+            print(f"Node service timed out: {method}")
+            return None
         except Exception as e:
             print(f"Error calling Node service: {e}")
             return None
     
     async def _get_real_analytics_data(self, user_id):
         """Get real analytics data from AnalyticsService"""
+        cached = self.user_analytics_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
             if self.use_real_analytics:
                 result = await self._call_node_service('getUserAnalyticsSummary', {'user_id': user_id})
                 if result and result.get('success'):
                     analytics = result.get('analytics', {})
-                    return (
+                    real_data = (
                         analytics.get('current_workload', 0),
                         analytics.get('expertise_by_category', {}),
                         analytics.get('historical_capacity', 3)
                     )
+                    self.user_analytics_cache.set(user_id, real_data)
+                    return real_data
         except Exception as e:
             print(f"Failed to get real analytics for user {user_id}: {e}")
         
         return None
 
+    async def _get_team_analytics_batch(self, group_id=None, user_ids=None):
+        """Get analytics for a whole team in one bridge call.
+
+        Returns a dict of user_id -> (workload, expertise, capacity), or None
+        when the batch lookup is unavailable. Long user_id lists are split
+        into ANALYTICS_BATCH_MAX_USERS-sized queries run concurrently.
+        """
+        user_ids = list(user_ids) if user_ids else None
+        if user_ids and len(user_ids) > ANALYTICS_BATCH_MAX_USERS:
+            chunks = [
+                user_ids[start:start + ANALYTICS_BATCH_MAX_USERS]
+                for start in range(0, len(user_ids), ANALYTICS_BATCH_MAX_USERS)
+            ]
+            results = await asyncio.gather(*(self._get_team_analytics_batch(group_id, chunk) for chunk in chunks))
+            if all(result is None for result in results):
+                return None
+            team_analytics = {}
+            for result in results:
+                team_analytics.update(result or {})
+            return team_analytics
+        
+        try:
+            if self.use_real_analytics:
+                params = {'group_id': group_id}
+                if user_ids:
+                    params['user_ids'] = user_ids
+                result = await self._call_node_service('getTeamAnalyticsBatch', params)
+                if result and result.get('success'):
+                    team_analytics = {}
+                    for member in result.get('members', []):
+                        real_data = (
+                            member.get('current_workload', 0),
+                            member.get('expertise_by_category', {}),
+                            member.get('historical_capacity', 3)
+                        )
+                        team_analytics[member['user_id']] = real_data
+                        self.user_analytics_cache.set(member['user_id'], real_data)
+                    return team_analytics
+        except Exception as e:
+            print(f"Failed to get batch analytics for group {group_id}: {e}")
+        
+        return None
+
+    async def _fetch_member_analytics(self, team_members, group_id=None):
+        """Get real analytics for every member, aligned with team_members.
+
+        Cached members are served from user_analytics_cache; the rest come from
+        the batch lookup when available. Otherwise members are fetched
+        concurrently, at most MEMBER_LOOKUP_CONCURRENCY at a time and each
+        bounded by MEMBER_LOOKUP_TIMEOUT. Entries are None for members without
+        real data so callers can apply their own per-member fallback.
+        """
+        member_analytics = [self.user_analytics_cache.get(member["uid"]) for member in team_members]
+        missing = [member for member, real_data in zip(team_members, member_analytics) if real_data is None]
+        if not missing:
+            return member_analytics
+        
+        team_analytics = await self._get_team_analytics_batch(
+            group_id, [member["uid"] for member in missing]
+        )
+        if team_analytics is not None:
+            fetched = {member["uid"]: team_analytics.get(member["uid"]) for member in missing}
+        else:
+            semaphore = asyncio.Semaphore(MEMBER_LOOKUP_CONCURRENCY)
+            
+            async def fetch(member):
+                async with semaphore:
+                    return await asyncio.wait_for(
+                        self._get_real_analytics_data(member["uid"]), MEMBER_LOOKUP_TIMEOUT
+                    )
+            
+            results = await asyncio.gather(*(fetch(member) for member in missing), return_exceptions=True)
+            
+            fetched = {}
+            for member, result in zip(missing, results):
+                if isinstance(result, Exception):
+                    print(f"Analytics lookup failed for user {member.get('username', 'unknown')}: {result!r}")
+                    result = None
+                fetched[member["uid"]] = result
+        
+        return [
+            real_data if real_data is not None else fetched.get(member["uid"])
+            for member, real_data in zip(team_members, member_analytics)
+        ]
+
+    async def _call_group_service_cached(self, method, params):
+        """Call a group-level bridge method, reusing a recent successful result."""
+        key = (params.get('group_id'), method, json.dumps(params, sort_keys=True))
+        cached = self.group_analytics_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = await self._call_node_service(method, params)
+        if result and result.get('success'):
+            self.group_analytics_cache.set(key, result)
+        return result
+
+    def _invalidate_analytics_cache(self, user_id=None, group_id=None):
+        """Drop cached analytics affected by a change for this user/group.
+
+        With neither id known, every cached analytics entry is dropped.
+        """
+        if user_id:
+            self.user_analytics_cache.invalidate(user_id)
+        if group_id:
+            self.team_members_cache.invalidate(group_id)
+            self.group_analytics_cache.invalidate_where(lambda key: key[0] == group_id)
+        if not user_id and not group_id:
+            self.user_analytics_cache.clear()
+            self.group_analytics_cache.clear()
+
+    def _resolve_member_analytics(self, team_members, member_analytics):
+        """Pair each member with real analytics, or mock data where missing."""
+        resolved = []
+        for member, real_data in zip(team_members, member_analytics):
+            workload, expertise, capacity = real_data or self._get_mock_analytics_data(member["uid"])
+            resolved.append((member, workload, expertise, capacity))
+        return resolved
+
+    def _summarize_data_source(self, member_analytics):
+        """Describe where a team's analytics came from: real, mock or mixed."""
+        real_count = sum(1 for real_data in member_analytics if real_data)
+        if member_analytics and real_count == len(member_analytics):
+            return "real"
+        return "mixed" if real_count else "mock"
+
     def _get_mock_analytics_data(self, user_id):
         mock_data = {
             # Development Team
@@ -400,9 +563,18 @@ class AnalyticsAgent:
         
         return user_data["workload"], user_data["expertise"], user_data["capacity"]
 
-    async def handle(self, request_type: str, data: dict):
+    async def handle(self, request_type: str, data: dict, on_progress=None):
+        """Route an analytics request.
+
+        on_progress, if given, is awaited with an early partial result by
+        actions that can produce one (see _get_assignment_recommendations).
+        """
         if request_type == "get_task_assignment_recommendations":
-            return await self._get_assignment_recommendations(data)
+            return await self._get_assignment_recommendations(data, on_progress)
+        elif request_type == "get_org_assignment_recommendations":
+            return await self._get_org_assignment_recommendations(data, on_progress)
+        elif request_type == "bulk_assignment_recommendations":
+            return await self._get_bulk_assignment_recommendations(data, on_progress)
         elif request_type == "record_task_assignment":
             return await self._record_task_assignment(data)
         elif request_type == "record_task_completion":
@@ -420,7 +592,13 @@ class AnalyticsAgent:
         else:
             return {"success": False, "error": f"Unknown request type: {request_type}"}
 
-    async def _get_assignment_recommendations(self, data: dict):
+    async def _get_assignment_recommendations(self, data: dict, on_progress=None):
+        """Rank team members for a task.
+
+        With on_progress, the deterministic ranking is passed to it as soon as
+        the base scores are ready (phase "initial"), and the LLM-enhanced
+        ranking is returned afterwards (phase "final").
+        """
         try:
             group_id = data.get("group_id")
             task_category = data.get("task_category", "general")
@@ -437,147 +615,502 @@ class AnalyticsAgent:
             if not team_members:
                 return {"success": False, "error": "No team members found"}
             
+            # Fetch analytics for the whole team up front (batched or concurrent)
+            member_analytics = await self._fetch_member_analytics(team_members, group_id)
+            
             # Phase 1: Calculate base scores using deterministic analytics (fast, reliable)
-            base_scores = []
-            for member in team_members:
-                try:
-                    # Try to get real analytics data first
-                    real_data = await self._get_real_analytics_data(member["uid"])
-                    if real_data:
-                        workload, expertise, capacity = real_data
-                        print(f"Using real analytics for {member['username']}")
-                    else:
-                        # Fallback to mock data
-                        workload, expertise, capacity = self._get_mock_analytics_data(member["uid"])
-                        print(f"Using mock analytics for {member['username']}")
-                    
-                    # Calculate deterministic base score using the 5 core metrics
-                    base_score = self._calculate_base_score(workload, expertise, capacity, task_category)
-                    
-                    base_scores.append({
-                        "user_id": member["uid"],
-                        "username": member["username"],
-                        "base_score": base_score,
-                        "metrics": {
-                            "workload": workload,
-                            "expertise": expertise.get(task_category, {}),
-                            "capacity": capacity,
-                            "data_source": "real" if real_data else "mock"
-                        }
-                    })
-                except Exception as e:
-                    print(f"Analytics failed for user {member.get('username', 'unknown')}: {e}")
-                    # Fallback to safe defaults
-                    base_scores.append({
-                        "user_id": member["uid"],
-                        "username": member["username"],
-                        "base_score": 50,  # Neutral default score
-                        "metrics": {
-                            "workload": 0,
-                            "expertise": {},
-                            "capacity": 3,
-                            "data_source": "default"
-                        }
-                    })
+            base_scores = self._score_members(team_members, member_analytics, task_category)
+            
+            return await self._recommend(base_scores, task_category, task_description, data, on_progress)
+            
+        except Exception as e:
+            print(f"Analytics recommendation error: {e}")
+            return {"success": False, "error": f"Analytics error: {str(e)}"}
+
+    async def _get_org_assignment_recommendations(self, data: dict, on_progress=None):
+        """Rank the best available people for a task across many groups.
+
+        Takes group_ids, or all_groups for every group in the org. Members
+        shared between groups are scored once, analytics are fetched in bulk,
+        and only the ORG_SHORTLIST_SIZE best base scores (picked with argpartition)
+        go to the LLM, so the prompt stays the same size however big the org.
+        """
+        try:
+            group_ids = data.get("group_ids") or []
+            task_category = data.get("task_category", "general")
+            task_description = data.get("task_description", "")
+            
+            if not group_ids and not data.get("all_groups"):
+                return {"success": False, "error": "group_ids or all_groups is required"}
             
-            # Phase 2: Enhance with LLM for contextual intelligence (adaptive, nuanced)
             try:
-                enhanced_recommendations, suggested_plan = await self._enhance_with_llm(
-                    base_scores, task_description, task_category, data
-                )
-                print("Successfully enhanced recommendations with LLM")
+                members = await self._get_org_members(group_ids or None)
             except Exception as e:
-                print(f"LLM enhancement failed, using fallback: {e}")
-                # Graceful fallback to deterministic recommendations
-                enhanced_recommendations = self._create_fallback_recommendations(base_scores, task_category)
-                suggested_plan = {
-                    "primary_assignee": enhanced_recommendations[0]["username"] if enhanced_recommendations else "N/A",
-                    "plan_type": "solo",
-                    "rationale": "Analytics-based assignment (LLM unavailable). Assigned to team member with highest expertise and capacity.",
-                    "fallback_used": True
-                }
+                return {"success": False, "error": f"Failed to get team members: {str(e)}"}
             
-            return {
-                "success": True,
-                "recommendations": enhanced_recommendations[:3],
-                "suggested_plan": suggested_plan,
-                "task_category": task_category,
-                "base_scores": [{"username": item["username"], "base_score": item["base_score"]} for item in base_scores]
-            }
+            if not members:
+                return {"success": False, "error": "No team members found"}
+            
+            member_analytics = await self._fetch_member_analytics(members)
+            base_scores = self._score_members(members, member_analytics, task_category)
+            for item, member in zip(base_scores, members):
+                item["group_ids"] = member["group_ids"]
+            
+            # argpartition top-k: O(n) selection instead of sorting the whole org
+            shortlist_size = int(data.get("shortlist_size", ORG_SHORTLIST_SIZE))
+            shortlist = [
+                base_scores[index]
+                for index in scoring.top_indices([item["base_score"] for item in base_scores], shortlist_size)
+            ]
+            
+            response = await self._recommend(shortlist, task_category, task_description, data, on_progress)
+            if response.get("success"):
+                response["candidates_considered"] = len(members)
+                response["groups_considered"] = len({gid for member in members for gid in member["group_ids"]})
+            return response
             
         except Exception as e:
-            print(f"Analytics recommendation error: {e}")
+            print(f"Org recommendation error: {e}")
             return {"success": False, "error": f"Analytics error: {str(e)}"}
 
-    def _calculate_base_score(self, workload, expertise, capacity, task_category):
+    async def _get_org_members(self, group_ids=None):
+        """Members of the given groups (all groups when None), one entry per user.
+
+        Each member carries the group_ids it was found in. Membership comes
+        from one bulk bridge query when possible, otherwise from per-group
+        lookups run concurrently.
+        """
+        memberships = None
+        if self.use_real_analytics:
+            params = {'group_ids': list(group_ids)} if group_ids else {}
+            result = await self._call_node_service('getGroupsMembers', params)
+            if result and result.get('success'):
+                memberships = [
+                    (row['group_id'], {"uid": row['uid'], "username": row['username']})
+                    for row in result.get('memberships', [])
+                ]
+        
+        if memberships is None:
+            if not group_ids:
+                raise ValueError("listing every group needs the analytics bridge; pass group_ids")
+            teams = await asyncio.gather(*(self._get_team_members(group_id) for group_id in group_ids))
+            memberships = [
+                (group_id, member) for group_id, team in zip(group_ids, teams) for member in team
+            ]
+        
+        members = {}
+        for group_id, member in memberships:
+            entry = members.get(member["uid"])
+            if entry is None:
+                entry = members[member["uid"]] = {"uid": member["uid"], "username": member["username"], "group_ids": []}
+            if group_id not in entry["group_ids"]:
+                entry["group_ids"].append(group_id)
+        return list(members.values())
+
+    async def _get_bulk_assignment_recommendations(self, data: dict, on_progress=None):
+        """Recommend an assignee for every task of a plan in one pass.
+
+        Takes group_id and tasks (each with title, task_category and
+        estimated_hours). Team analytics are fetched once and the tasks are
+        assigned jointly by scoring.assign_tasks, so capacity used by earlier
+        tasks in the batch counts against later ones. One LLM call then
+        reviews the whole draft (skipped with use_llm false). With
+        on_progress, the draft is passed to it first (phase "initial").
         """
-        Calculate base score using deterministic analytics - implements the 5 core metrics:
-        1. Task completion time (via expertise score)
-        2. Task success rate 
-        3. Current workload
-        4. Task category expertise
-        5. Historical capacity
+        try:
+            group_id = data.get("group_id")
+            tasks = data.get("tasks")
+            
+            if not group_id:
+                return {"success": False, "error": "group_id is required"}
+            if not tasks or not isinstance(tasks, list):
+                return {"success": False, "error": "tasks is required"}
+            if len(tasks) > BULK_ASSIGNMENT_MAX_TASKS:
+                return {"success": False, "error": f"At most {BULK_ASSIGNMENT_MAX_TASKS} tasks per request"}
+            
+            plan_tasks = [self._normalize_plan_task(index, task) for index, task in enumerate(tasks)]
+            categories = list(dict.fromkeys(task["task_category"] for task in plan_tasks))
+            
+            try:
+                team_members = await self._get_team_members(group_id)
+            except Exception as e:
+                return {"success": False, "error": f"Failed to get team members: {str(e)}"}
+            
+            if not team_members:
+                return {"success": False, "error": "No team members found"}
+            
+            # One analytics fetch for the whole plan
+            member_analytics = await self._fetch_member_analytics(team_members, group_id)
+            candidates = []
+            for member, real_data in zip(team_members, member_analytics):
+                workload, expertise, capacity = self._resolve_metrics(member, real_data, categories)
+                if workload is not None:
+                    candidates.append((member, workload, expertise, capacity))
+            
+            if not candidates:
+                return {"success": False, "error": "No team members with usable analytics"}
+            
+            columns = {category: column for column, category in enumerate(categories)}
+            assignments, _ = scoring.assign_tasks(
+                *scoring.build_arrays(
+                    [(workload, expertise, capacity) for _, workload, expertise, capacity in candidates], categories
+                ),
+                [columns[task["task_category"]] for task in plan_tasks],
+                [task["estimated_hours"] for task in plan_tasks]
+            )
+            
+            entries = []
+            for task, assignment in zip(plan_tasks, assignments):
+                member, workload, expertise, capacity = candidates[assignment["row"]]
+                entries.append({
+                    **task,
+                    "user_id": member["uid"],
+                    "username": member["username"],
+                    "score": assignment["score"],
+                    "over_capacity": assignment["over_capacity"],
+                    "alternatives": [candidates[row][0]["username"] for row in assignment["alternatives"]],
+                    "reasoning": self._generate_simple_reasoning({
+                        "expertise": expertise.get(task["task_category"], {}),
+                        "workload": workload,
+                        "capacity": capacity
+                    }, task["task_category"]),
+                    "source": "analytics"
+                })
+            
+            if on_progress:
+                await on_progress(self._bulk_assignment_response(group_id, entries, candidates, phase="initial"))
+            
+            summary, diagnostics = None, None
+            if data.get("use_llm", True):
+                try:
+                    summary, diagnostics = await self._review_bulk_assignments_with_llm(entries, candidates, categories)
+                except Exception as e:
+                    print(f"Bulk assignment LLM review failed, keeping analytics draft: {e}")
+            
+            response = self._bulk_assignment_response(
+                group_id, entries, candidates, phase="final" if on_progress else None
+            )
+            response["summary"] = summary or "Analytics-based assignment: each task went to the best-scoring member with remaining capacity."
+            if diagnostics is not None:
+                response["llm_diagnostics"] = diagnostics
+            return response
+            
+        except Exception as e:
+            print(f"Bulk assignment error: {e}")
+            return {"success": False, "error": f"Analytics error: {str(e)}"}
+
+    def _normalize_plan_task(self, index, task):
+        """Plan task fields the bulk assignment uses, with defaults."""
+        if not isinstance(task, dict):
+            task = {}
+        try:
+            hours = max(0.0, float(task.get("estimated_hours", task.get("hours")) or 1))
+        except (TypeError, ValueError):
+            hours = 1.0
+        return {
+            "task_index": index,
+            "task_id": task.get("task_id", task.get("id")),
+            "title": task.get("title") or task.get("name") or f"Task {index + 1}",
+            "task_category": task.get("task_category") or task.get("category") or "general",
+            "estimated_hours": hours
+        }
+
+    def _bulk_load(self, entries, candidates):
+        """Tasks and hours assigned to each candidate by the current entries."""
+        load = {member["uid"]: [0, 0.0] for member, _, _, _ in candidates}
+        for entry in entries:
+            load[entry["user_id"]][0] += 1
+            load[entry["user_id"]][1] += entry["estimated_hours"]
+        return load
+
+    def _bulk_assignment_response(self, group_id, entries, candidates, phase=None):
+        load = self._bulk_load(entries, candidates)
+        response = {
+            "success": True,
+            "group_id": group_id,
+            "assignments": entries,
+            "member_load": [
+                {
+                    "user_id": member["uid"],
+                    "username": member["username"],
+                    "current_workload": workload,
+                    "capacity": capacity,
+                    "assigned_tasks": load[member["uid"]][0],
+                    "assigned_hours": load[member["uid"]][1]
+                }
+                for member, workload, _, capacity in candidates
+            ]
+        }
+        if phase:
+            response["phase"] = phase
+        return response
+
+    async def _review_bulk_assignments_with_llm(self, entries, candidates, categories):
+        """Let one LLM call adjust the draft; apply changes that keep capacity.
+
+        Updates entries in place and returns (summary, diagnostics).
         """
-        base_score = 50  # Neutral starting point
+        load = self._bulk_load(entries, candidates)
+        team_data = [
+            {
+                "username": member["username"],
+                "current_workload": workload,
+                "capacity": capacity,
+                "assigned_tasks": load[member["uid"]][0],
+                "expertise": {
+                    category: (expertise.get(category) or {}).get("expertise_score", 0) for category in categories
+                }
+            }
+            for member, workload, expertise, capacity in candidates
+        ]
+        draft = [
+            {
+                "task_index": entry["task_index"],
+                "title": entry["title"],
+                "task_category": entry["task_category"],
+                "estimated_hours": entry["estimated_hours"],
+                "assignee": entry["username"],
+                "alternatives": entry["alternatives"]
+            }
+            for entry in entries
+        ]
+        prompt = prompts.BULK_ASSIGNMENT.render(
+            team_data=json.dumps(team_data, separators=(",", ":")),
+            draft=json.dumps(draft, separators=(",", ":"))
+        )
         
-        # Metric 1 & 4: Task category expertise (0-35 points)
-        expertise_data = expertise.get(task_category, {})
-        expertise_score = expertise_data.get("expertise_score", 0)
+        llm_response = await llm_service.generate(prompt,
+            generation_config_override=genai.types.GenerationConfig(
+                temperature=0.3,
+                response_mime_type='application/json'
+            ),
+            cache=True,
+            system_instruction=prompts.BULK_ASSIGNMENT.system,
+            priority=llm_scheduler.PRIORITY_ANALYTICS,
+            timeout=ANALYTICS_LLM_TIMEOUT,
+            hedge=True)
         
-        # Higher expertise = better completion time and category fit
-        expertise_bonus = (expertise_score / 100) * 35
+        try:
+            llm_data = json.loads(llm_response)
+        except json.JSONDecodeError as e:
+            print(f"LLM JSON parsing failed: {e}")
+            raise Exception("LLM returned invalid JSON")
         
-        # Metric 2: Success rate bonus (0-25 points)
-        success_rate = expertise_data.get("success_rate_percentage", 50)
-        success_bonus = (success_rate / 100) * 25
+        by_name = {}
+        for candidate in candidates:
+            by_name.setdefault(recommendation_merge.normalize_username(candidate[0]["username"]), candidate)
         
-        # Metric 3 & 5: Workload vs Capacity analysis (0-20 points penalty)
-        if capacity > 0:
-            workload_ratio = workload / capacity
-            
-            # Optimal workload is 60-80% of capacity
-            if workload_ratio <= 0.6:
-                # Under-utilized, good availability
-                workload_adjustment = 0
-            elif workload_ratio <= 0.8:
-                # Optimal utilization
-                workload_adjustment = 5  # Small bonus for being in sweet spot
-            elif workload_ratio <= 1.0:
-                # At capacity, some penalty
-                workload_adjustment = -10
-            else:
-                # Over capacity, significant penalty
-                workload_adjustment = -20
-        else:
-            # No historical capacity data
-            workload_adjustment = -5 if workload > 2 else 0
+        applied, unknown, over_capacity, invalid = 0, [], [], []
+        for change in llm_data.get("assignments") or []:
+            index = change.get("task_index") if isinstance(change, dict) else None
+            if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(entries):
+                invalid.append(change)
+                continue
+            candidate = by_name.get(recommendation_merge.normalize_username(change.get("username", "")))
+            if candidate is None:
+                unknown.append(change.get("username"))
+                continue
+            member, workload, expertise, capacity = candidate
+            entry = entries[index]
+            if member["uid"] == entry["user_id"]:
+                continue
+            limit = capacity if capacity > 0 else scoring.DEFAULT_CAPACITY
+            if workload + load[member["uid"]][0] + 1 > limit:
+                over_capacity.append(member["username"])
+                continue
+            
+            # Score the new assignee like the draft did: against the work already in the batch
+            category = entry["task_category"]
+            score = scoring.score_members([(workload + load[member["uid"]][0], expertise, capacity)], category)[0]
+            # The draft's pick becomes the first alternative
+            alternatives = [entry["username"]] + [name for name in entry["alternatives"] if name != member["username"]]
+            load[entry["user_id"]][0] -= 1
+            load[member["uid"]][0] += 1
+            entry.update({
+                "user_id": member["uid"],
+                "username": member["username"],
+                "score": score,
+                "over_capacity": False,
+                "alternatives": alternatives[:max(1, len(entry["alternatives"]))],
+                "reasoning": change.get("reasoning") or self._generate_simple_reasoning({
+                    "expertise": expertise.get(category, {}),
+                    "workload": workload,
+                    "capacity": capacity
+                }, category),
+                "source": "llm"
+            })
+            applied += 1
         
-        # Additional considerations for task assignment
+        diagnostics = {
+            "changes_applied": applied,
+            "unknown_entries": unknown,
+            "rejected_over_capacity": over_capacity,
+            "invalid_entries": invalid
+        }
+        if unknown or over_capacity or invalid:
+            print(f"Bulk assignment review issues: {diagnostics}")
+        summary = llm_data.get("summary")
+        return summary if isinstance(summary, str) else None, diagnostics
+
+    def _resolve_metrics(self, member, real_data, categories):
+        """(workload, expertise, capacity) from real analytics or mock data.
+
+        Returns (None, None, None) when the metrics are malformed for any of
+        `categories`, so one bad member can't fail a vectorized batch.
+        """
+        try:
+            # Try to get real analytics data first
+            if real_data:
+                workload, expertise, capacity = real_data
+            else:
+                # Fallback to mock data
+                workload, expertise, capacity = self._get_mock_analytics_data(member["uid"])
+            
+            float(workload), float(capacity)
+            for category in categories:
+                category_data = expertise.get(category) or {}
+                float(category_data.get("expertise_score", 0)), float(category_data.get("success_rate_percentage", 50))
+            return workload, expertise, capacity
+        except Exception as e:
+            print(f"Analytics failed for user {member.get('username', 'unknown')}: {e}")
+            return None, None, None
+
+    def _score_members(self, team_members, member_analytics, task_category):
+        """Base score entries for each member, in team order, from one vectorized pass."""
+        scorable = [
+            (member, real_data, *self._resolve_metrics(member, real_data, [task_category]))
+            for member, real_data in zip(team_members, member_analytics)
+        ]
         
-        # Availability bonus: completely free users get a small boost
-        availability_bonus = 10 if workload == 0 else 0
+        # Score the whole team in one vectorized pass (5 core metrics)
+        valid = [entry for entry in scorable if entry[2] is not None]
+        scores = iter(scoring.score_members(
+            [(workload, expertise, capacity) for _, _, workload, expertise, capacity in valid], task_category
+        ))
         
-        # Experience penalty: very low expertise in category
-        experience_penalty = -10 if expertise_score < 20 else 0
+        base_scores = []
+        for member, real_data, workload, expertise, capacity in scorable:
+            if workload is not None:
+                base_scores.append({
+                    "user_id": member["uid"],
+                    "username": member["username"],
+                    "base_score": next(scores),
+                    "metrics": {
+                        "workload": workload,
+                        "expertise": expertise.get(task_category, {}),
+                        "capacity": capacity,
+                        "data_source": "real" if real_data else "mock"
+                    }
+                })
+            else:
+                # Fallback to safe defaults
+                base_scores.append({
+                    "user_id": member["uid"],
+                    "username": member["username"],
+                    "base_score": 50,  # Neutral default score
+                    "metrics": {
+                        "workload": 0,
+                        "expertise": {},
+                        "capacity": 3,
+                        "data_source": "default"
+                    }
+                })
+        return base_scores
+
+    async def _recommend(self, base_scores, task_category, task_description, data, on_progress=None):
+        """Turn base scores into the recommendations response (phase 2 and fallback)."""
+        if on_progress:
+            initial_recommendations = self._create_fallback_recommendations(base_scores, task_category)
+            await on_progress(self._recommendations_response(
+                initial_recommendations,
+                {
+                    "primary_assignee": initial_recommendations[0]["username"] if initial_recommendations else "N/A",
+                    "plan_type": "solo",
+                    "rationale": "Analytics-based ranking. AI-enhanced recommendations will follow.",
+                    "pending_enhancement": True
+                },
+                task_category, base_scores, phase="initial"
+            ))
         
-        # Calculate final score
-        final_score = (base_score + 
-                      expertise_bonus + 
-                      success_bonus + 
-                      workload_adjustment + 
-                      availability_bonus + 
-                      experience_penalty)
+        # Phase 2: Enhance with LLM for contextual intelligence (adaptive, nuanced)
+        diagnostics = None
+        try:
+            enhanced_recommendations, suggested_plan, diagnostics = await self._enhance_with_llm(
+                base_scores, task_description, task_category, data
+            )
+            print("Successfully enhanced recommendations with LLM")
+        except Exception as e:
+            print(f"LLM enhancement failed, using fallback: {e}")
+            # Graceful fallback to deterministic recommendations
+            enhanced_recommendations = self._create_fallback_recommendations(base_scores, task_category)
+            suggested_plan = {
+                "primary_assignee": enhanced_recommendations[0]["username"] if enhanced_recommendations else "N/A",
+                "plan_type": "solo",
+                "rationale": "Analytics-based assignment (LLM unavailable). Assigned to team member with highest expertise and capacity.",
+                "fallback_used": True
+            }
         
-        # Clamp between 0-100 and round to 1 decimal place
-        return round(max(0, min(100, final_score)), 1)
+        response = self._recommendations_response(
+            enhanced_recommendations, suggested_plan, task_category, base_scores,
+            phase="final" if on_progress else None
+        )
+        if diagnostics is not None:
+            response["llm_diagnostics"] = diagnostics
+        return response
+
+    def _recommendations_response(self, recommendations, suggested_plan, task_category, base_scores, phase=None):
+        response = {
+            "success": True,
+            "recommendations": recommendations[:RECOMMENDATIONS_RETURNED],
+            "suggested_plan": suggested_plan,
+            "task_category": task_category,
+            "base_scores": [{"username": item["username"], "base_score": item["base_score"]} for item in base_scores]
+        }
+        if phase:
+            response["phase"] = phase
+        return response
+
+    def _shortlist_for_llm(self, base_scores, size=LLM_SHORTLIST_SIZE, include_development=True):
+        """Members worth sending to the LLM, as (candidate_type, score_data) pairs.
+
+        The `size` best base scores, plus - when include_development is set -
+        the best-scoring remaining member with low category expertise and
+        spare capacity, so the model can still suggest a growth assignment.
+        """
+        top = [base_scores[index] for index in scoring.top_indices([item["base_score"] for item in base_scores], size)]
+        shortlist = [("top_score", item) for item in top]
+        if include_development:
+            chosen = {id(item) for item in top}
+            development = [
+                item for item in base_scores
+                if id(item) not in chosen
+                and item["metrics"]["expertise"].get("expertise_score", 0) < DEVELOPMENT_EXPERTISE_MAX
+                and item["metrics"]["workload"] < item["metrics"]["capacity"]
+            ]
+            if development:
+                shortlist.append(("development", max(development, key=lambda item: item["base_score"])))
+        return shortlist
 
     async def _enhance_with_llm(self, base_scores, task_description, task_category, context):
-        """Use LLM to enhance recommendations with contextual intelligence."""
+        """Use LLM to enhance recommendations with contextual intelligence.
+
+        Only the _shortlist_for_llm members are sent (size from the request's
+        llm_shortlist_size, default LLM_SHORTLIST_SIZE), so prompt and output
+        tokens scale with the shortlist rather than the team. Everyone else
+        keeps their base score and ranks after the members the model reviewed.
+        Returns (recommendations, suggested_plan, merge diagnostics).
+        """
+        shortlist = self._shortlist_for_llm(
+            base_scores,
+            int(context.get("llm_shortlist_size", LLM_SHORTLIST_SIZE)),
+            context.get("include_development_candidate", True)
+        )
         team_data = []
-        for score_data in base_scores:
+        for candidate_type, score_data in shortlist:
             metrics = score_data["metrics"]
             team_data.append({
                 "username": score_data["username"],
+                "candidate_type": candidate_type,
                 "base_score": score_data["base_score"],
                 "current_workload": metrics["workload"],
                 "expertise_score": metrics["expertise"].get("expertise_score", 0),
@@ -585,76 +1118,26 @@ class AnalyticsAgent:
                 "historical_capacity": metrics["capacity"]
             })
 
-        prompt = f"""You are an intelligent task assignment system with access to comprehensive team analytics. Your role is to enhance data-driven recommendations with contextual intelligence and strategic thinking.
-
-TASK DETAILS:
-- Category: {task_category}
-- Description: {task_description}
-- Priority: {context.get('priority', 'normal')}
-- Deadline: {context.get('deadline', 'flexible')}
-- Additional Context: {context.get('additional_context', 'None provided')}
-
-TEAM ANALYTICS DATA (with base scores calculated from 5 core metrics):
-{json.dumps(team_data, indent=2)}
-
-ANALYTICS METHODOLOGY:
-The base scores are calculated using:
-1. Task completion time patterns (via expertise scores)
-2. Historical success rates in this category
-3. Current workload vs capacity analysis
-4. Category-specific expertise levels
-5. Historical capacity and performance data
-
-YOUR ENHANCEMENT ROLE:
-1. **Contextual Intelligence**: Consider task complexity, urgency, and strategic value
-2. **Team Dynamics**: Factor in collaboration patterns, mentoring opportunities
-3. **Skill Development**: Balance efficiency vs growth opportunities
-4. **Risk Assessment**: Consider reliability needs vs development potential
-5. **Workload Optimization**: Ensure sustainable team performance
-
-DECISION FACTORS TO CONSIDER:
-- Task complexity vs team member experience level
-- Opportunity for skill development vs need for reliable delivery
-- Team workload distribution and burnout prevention
-- Cross-training and knowledge sharing opportunities
-- Strategic team capability building
-
-For each team member, provide:
-- adjusted_score (0-100): Can modify base_score based on contextual factors
-- confidence_level (low/medium/high): Your confidence in this recommendation
-- reasoning (2-3 sentences): Clear explanation of your scoring rationale
-- development_opportunity (optional): How this task could help them grow
-- risk_factors (optional): Any concerns about this assignment
-
-After analyzing all members, provide a strategic assignment plan:
-
-Respond with JSON in this exact format:
-{{
-  "recommendations": [
-    {{
-      "username": "member_name",
-      "adjusted_score": 85,
-      "confidence_level": "high",
-      "reasoning": "Strong expertise in {task_category} with manageable workload. Analytics show 92% success rate and optimal capacity utilization.",
-      "development_opportunity": "Opportunity to mentor junior team members while delivering reliably",
-      "risk_factors": "None identified - strong track record in this category"
-    }}
-  ],
-  "suggested_plan": {{
-    "primary_assignee": "member_name",
-    "plan_type": "solo",
-    "rationale": "Analytics indicate this member has optimal expertise-to-workload ratio for reliable delivery. Their high success rate in {task_category} minimizes project risk.",
-    "alternative_approach": "Could pair with junior member for knowledge transfer if timeline allows",
-    "strategic_value": "Maintains team velocity while building category expertise"
-  }}
-}}"""
+        prompt = prompts.ASSIGNMENT_ENHANCEMENT.render(
+            task_category=task_category,
+            task_description=task_description,
+            priority=context.get('priority', 'normal'),
+            deadline=context.get('deadline', 'flexible'),
+            additional_context=context.get('additional_context', 'None provided'),
+            team_data=json.dumps(team_data, separators=(",", ":"))
+        )
 
         # Generate LLM response
         llm_response = await llm_service.generate(prompt, 
             generation_config_override=genai.types.GenerationConfig(
                 temperature=0.3,
                 response_mime_type='application/json'
-            ))
+            ),
+            cache=True,
+            system_instruction=prompts.ASSIGNMENT_ENHANCEMENT.system,
+            priority=llm_scheduler.PRIORITY_ANALYTICS,
+            timeout=ANALYTICS_LLM_TIMEOUT,
+            hedge=True)
         
         # Parse LLM response
         try:
@@ -665,36 +1148,11 @@ Respond with JSON in this exact format:
             raise Exception("LLM returned invalid JSON")
         
         # Merge LLM insights with base data
-        enhanced_recommendations = []
-        for base_item in base_scores:
-            # Find corresponding LLM recommendation
-            llm_rec = next((r for r in llm_data["recommendations"] 
-                          if r["username"] == base_item["username"]), None)
-            
-            if llm_rec:
-                enhanced_recommendations.append({
-                    "user_id": base_item["user_id"],
-                    "username": base_item["username"],
-                    "score": llm_rec["adjusted_score"],
-                    "base_score": base_item["base_score"],
-                    "confidence_level": llm_rec["confidence_level"],
-                    "reasoning": llm_rec["reasoning"],
-                    "development_opportunity": llm_rec.get("development_opportunity"),
-                    "metrics": base_item["metrics"]
-                })
-            else:
-                # Fallback to base score if LLM didn't process this member
-                enhanced_recommendations.append({
-                    "user_id": base_item["user_id"],
-                    "username": base_item["username"],
-                    "score": base_item["base_score"],
-                    "base_score": base_item["base_score"],
-                    "reasoning": "Based on analytics data only",
-                    "metrics": base_item["metrics"]
-                })
-        
-        # Sort by adjusted score
-        enhanced_recommendations.sort(key=lambda x: x["score"], reverse=True)
+        enhanced_recommendations, diagnostics = recommendation_merge.merge(
+            base_scores, [item for _, item in shortlist], llm_data.get("recommendations")
+        )
+        if recommendation_merge.has_issues(diagnostics):
+            print(f"LLM recommendation merge issues: {diagnostics}")
         
         # Add suggested plan from LLM
         suggested_plan = llm_data.get("suggested_plan", {
@@ -703,12 +1161,13 @@ Respond with JSON in this exact format:
             "rationale": "Default assignment to highest scoring team member"
         })
         
-        return enhanced_recommendations, suggested_plan
+        return enhanced_recommendations, suggested_plan, diagnostics
 
-    def _create_fallback_recommendations(self, base_scores, task_category):
-        """Generate simple recommendations when LLM is unavailable."""
+    def _create_fallback_recommendations(self, base_scores, task_category, limit=RECOMMENDATIONS_RETURNED):
+        """Generate simple recommendations for the `limit` best base scores, best first."""
         fallback_recommendations = []
-        for item in base_scores:
+        best = scoring.top_indices([item["base_score"] for item in base_scores], limit)
+        for item in (base_scores[index] for index in best):
             fallback_recommendations.append({
                 "user_id": item["user_id"],
                 "username": item["username"],
@@ -717,8 +1176,6 @@ Respond with JSON in this exact format:
                 "reasoning": self._generate_simple_reasoning(item["metrics"], task_category),
                 "metrics": item["metrics"]
             })
-        
-        fallback_recommendations.sort(key=lambda x: x["score"], reverse=True)
         return fallback_recommendations
 
     def _generate_simple_reasoning(self, metrics, task_category):
@@ -771,6 +1228,7 @@ Respond with JSON in this exact format:
                 })
                 
                 if result and result.get('success'):
+                    self._invalidate_analytics_cache(user_id=user_id, group_id=group_id)
                     print(f"Real: Recorded task assignment - Task: {task_id}, User: {user_id}, Category: {task_category}")
                     return {"success": True, "message": "Task assignment recorded", "method": "real"}
             
@@ -798,6 +1256,7 @@ Respond with JSON in this exact format:
                 })
                 
                 if result and result.get('success'):
+                    self._invalidate_analytics_cache(user_id=data.get("user_id"), group_id=data.get("group_id"))
                     print(f"Real: Recorded task completion - Task: {task_id}, Success: {success}")
                     return {"success": True, "message": "Task completion recorded", "method": "real"}
             
@@ -948,15 +1407,12 @@ Respond with JSON in this exact format:
             
             # Calculate base scores with mock data
             base_scores = []
-            for member in mock_team_members:
+            scores = scoring.score_members([
+                (analytics["workload"], analytics["expertise"], analytics["capacity"])
+                for analytics in (mock_analytics[member["uid"]] for member in mock_team_members)
+            ], task_category)
+            for member, base_score in zip(mock_team_members, scores):
                 user_analytics = mock_analytics[member["uid"]]
-                base_score = self._calculate_base_score(
-                    user_analytics["workload"],
-                    user_analytics["expertise"],
-                    user_analytics["capacity"],
-                    task_category
-                )
-                
                 base_scores.append({
                     "user_id": member["uid"],
                     "username": member["username"],
@@ -970,7 +1426,7 @@ Respond with JSON in this exact format:
             
             # Enhance with LLM
             try:
-                enhanced_recommendations, suggested_plan = await self._enhance_with_llm(
+                enhanced_recommendations, suggested_plan, _ = await self._enhance_with_llm(
                     base_scores, task_description, task_category, data
                 )
             except Exception as e:
@@ -1003,17 +1459,16 @@ Respond with JSON in this exact format:
             
             # Try to get real team analytics
             if self.use_real_analytics:
-                result = await self._call_node_service('getTeamAnalyticsSummary', {'group_id': group_id})
+                result = await self._call_group_service_cached('getTeamAnalyticsSummary', {'group_id': group_id})
                 if result and result.get('success'):
                     return result
             
-            # Fallback to mock team analytics
+            # Fallback to per-member analytics (mock where unavailable)
             team_members = await self._get_team_members(group_id)
+            member_analytics = await self._fetch_member_analytics(team_members, group_id)
             team_analytics = []
             
-            for member in team_members:
-                workload, expertise, capacity = self._get_mock_analytics_data(member["uid"])
-                
+            for member, workload, expertise, capacity in self._resolve_member_analytics(team_members, member_analytics):
                 # Calculate overall performance score
                 overall_score = 0
                 total_categories = 0
@@ -1037,7 +1492,7 @@ Respond with JSON in this exact format:
                 "success": True,
                 "group_id": group_id,
                 "team_analytics": team_analytics,
-                "data_source": "mock"
+                "data_source": self._summarize_data_source(member_analytics)
             }
             
         except Exception as e:
@@ -1053,17 +1508,16 @@ Respond with JSON in this exact format:
             
             # Try to get real workload distribution
             if self.use_real_analytics:
-                result = await self._call_node_service('getWorkloadDistribution', {'group_id': group_id})
+                result = await self._call_group_service_cached('getWorkloadDistribution', {'group_id': group_id})
                 if result and result.get('success'):
                     return result
             
-            # Fallback to mock workload distribution
+            # Fallback to per-member analytics (mock where unavailable)
             team_members = await self._get_team_members(group_id)
+            member_analytics = await self._fetch_member_analytics(team_members, group_id)
             workload_distribution = []
             
-            for member in team_members:
-                workload, expertise, capacity = self._get_mock_analytics_data(member["uid"])
-                
+            for member, workload, expertise, capacity in self._resolve_member_analytics(team_members, member_analytics):
                 utilization = (workload / capacity * 100) if capacity > 0 else 0
                 
                 # Determine status based on utilization
@@ -1094,7 +1548,7 @@ Respond with JSON in this exact format:
                 "success": True,
                 "group_id": group_id,
                 "workload_distribution": workload_distribution,
-                "data_source": "mock"
+                "data_source": self._summarize_data_source(member_analytics)
             }
             
         except Exception as e:
@@ -1111,21 +1565,23 @@ Respond with JSON in this exact format:
             
             # Try to get real expertise rankings
             if self.use_real_analytics:
-                result = await self._call_node_service('getCategoryExpertiseRankings', {
+                result = await self._call_group_service_cached('getCategoryExpertiseRankings', {
                     'group_id': group_id,
                     'category': category
                 })
                 if result and result.get('success'):
                     return result
             
-            # Fallback to mock expertise rankings
+            # Fallback to per-member analytics (mock where unavailable)
             team_members = await self._get_team_members(group_id)
+            member_analytics = await self._fetch_member_analytics(team_members, group_id)
+            resolved = self._resolve_member_analytics(team_members, member_analytics)
+            data_source = self._summarize_data_source(member_analytics)
             
             if category:
                 # Single category rankings
                 rankings = []
-                for member in team_members:
-                    workload, expertise, capacity = self._get_mock_analytics_data(member["uid"])
+                for member, workload, expertise, capacity in resolved:
                     category_data = expertise.get(category, {})
                     
                     rankings.append({
@@ -1145,7 +1601,7 @@ Respond with JSON in this exact format:
                     "group_id": group_id,
                     "category": category,
                     "rankings": rankings,
-                    "data_source": "mock"
+                    "data_source": data_source
                 }
             else:
                 # All categories rankings
@@ -1154,8 +1610,7 @@ Respond with JSON in this exact format:
                 
                 for cat in categories:
                     rankings = []
-                    for member in team_members:
-                        workload, expertise, capacity = self._get_mock_analytics_data(member["uid"])
+                    for member, workload, expertise, capacity in resolved:
                         category_data = expertise.get(cat, {})
                         
                         rankings.append({
@@ -1173,7 +1628,7 @@ Respond with JSON in this exact format:
                     "success": True,
                     "group_id": group_id,
                     "expertise_rankings": all_rankings,
-                    "data_source": "mock"
+                    "data_source": data_source
                 }
             
         except Exception as e:
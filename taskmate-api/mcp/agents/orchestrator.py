@@ -1,45 +1,176 @@
+import asyncio
 import json
+import weakref
+from collections import deque
 from fastapi import WebSocket
 import google.generativeai as genai
 
+import llm_scheduler
 import llm_service
+import conversation_history
+import plan_readiness
+import project_brief
+import prompts
+import session_store
+from streaming_json import JsonStringFieldExtractor, JsonArrayItemExtractor, loads_lenient
 from agents.recommendations_agent import RecommendationsAgent
 from agents.analytics_agent import AnalyticsAgent
 
+# Reply when the model misses its deadline for a chat turn
+CHAT_TIMEOUT_REPLY = "Sorry, I'm taking too long to respond right now. Could you send that again in a moment?"
+# Reply when the model call failed outright (e.g. rate limited after all retries)
+CHAT_ERROR_REPLY = "Sorry, I couldn't come up with a reply just now. Could you send that again in a moment?"
+PLAN_FAILED_REPLY = "I had trouble generating the project plan. Could you provide a bit more detail about what you want to build?"
+
 class OrchestratorAgent:
     def __init__(self):
-        self.sessions = {}
+        self.sessions = session_store.create_session_store()
+        # States of sessions with a message in progress, shared by every handler
+        # touching that session and written back to the store when it finishes
+        self._active_sessions = {}
+        self._active_counts = {}
+        self._summary_tasks = {}
+        # Chat turns of a session run one at a time, in arrival order
+        self._chat_locks = weakref.WeakValueDictionary()
         self.recommendations_agent = RecommendationsAgent()
         self.analytics_agent = AnalyticsAgent()
 
     def get_session_state(self, session_id: str):
-        if session_id not in self.sessions:
-            self.sessions[session_id] = {
-                "conversation_history": [],  # Simple conversation memory
+        state = self._active_sessions.get(session_id)
+        if state is None:
+            state = self.sessions.get(session_id)
+        if state is not None and not isinstance(state["conversation_history"], deque):
+            # Loaded from a serializing store: restore the bounded history buffer
+            state["conversation_history"] = conversation_history.new_history(state["conversation_history"])
+        if state is None:
+            state = {
+                "conversation_history": conversation_history.new_history(),  # Structured turns, bounded
                 "project_info": "",  # Accumulated project information
                 "waiting_for_confirmation": False
             }
-        return self.sessions[session_id]
+            self.sessions.save(session_id, state)
+        return state
+
+    def end_session(self, session_id: str):
+        """Clean up after a client disconnects.
 
-    def add_to_conversation(self, session_id: str, message: str, is_user: bool = True):
-        """Add message to conversation history, keep last 10 messages."""
+        Sessions in a shared store are kept: the client may reconnect to
+        another worker, or to this one after a restart. The idle TTL and the
+        sweeper reclaim them.
+        """
+        task = self._summary_tasks.pop(session_id, None)
+        if task:
+            task.cancel()
+        if not self.sessions.shared:
+            self.sessions.delete(session_id)
+
+    def add_to_conversation(self, session_id: str, message: str, is_user: bool = True,
+                            kind: str = "text", summary: str = None):
+        """Add a turn to the conversation history; the oldest turns fall off the buffer."""
         state = self.get_session_state(session_id)
-        speaker = "User" if is_user else "Assistant"
-        state["conversation_history"].append(f"{speaker}: {message}")
-        
-        # Keep only last 20 messages
-        if len(state["conversation_history"]) > 20:
-            state["conversation_history"] = state["conversation_history"][-20:]
+        role = "user" if is_user else "assistant"
+        state["conversation_history"].append(conversation_history.make_turn(role, message, kind, summary))
+        state["turn_count"] = state.get("turn_count", 0) + 1
 
     def get_conversation_context(self, session_id: str) -> str:
-        """Get recent conversation for context."""
+        """Get recent conversation for context, within the prompt token budget.
+
+        Once a project brief exists, it stands in for the turns folded into
+        it and every turn after those is sent verbatim (newest first, within
+        the budget), so nothing falls between the brief and the recent turns.
+        """
+        state = self.get_session_state(session_id)
+        brief = state.get("project_brief")
+        if not brief:
+            return conversation_history.build_context(state["conversation_history"])
+        history = list(state["conversation_history"])
+        unsummarized = state.get("turn_count", len(history)) - state.get("summarized_turns", 0)
+        recent = history[max(0, len(history) - unsummarized):] if unsummarized > 0 else []
+        return (
+            f"PROJECT BRIEF (summary of earlier conversation):\n{project_brief.render(brief)}\n\n"
+            f"RECENT TURNS:\n{conversation_history.build_context(recent)}"
+        )
+
+    def _maybe_summarize(self, session_id: str):
+        """Start a background brief update once enough turns have piled up."""
+        state = self.get_session_state(session_id)
+        pending = state.get("turn_count", 0) - state.get("summarized_turns", 0)
+        if pending < project_brief.SUMMARY_EVERY_TURNS + project_brief.RECENT_TURNS_AFTER_BRIEF:
+            return
+        if session_id in self._summary_tasks:
+            return
+        task = asyncio.create_task(self._summarize_session(session_id))
+        self._summary_tasks[session_id] = task
+        task.add_done_callback(lambda _: self._summary_tasks.pop(session_id, None))
+
+    async def _summarize_session(self, session_id: str):
+        """Fold turns older than the recent window and project_info into the brief."""
+        state = self.get_session_state(session_id)
+        history = list(state["conversation_history"])
+        turn_count = state.get("turn_count", len(history))
+        summarized = state.get("summarized_turns", 0)
+        fold_through = turn_count - project_brief.RECENT_TURNS_AFTER_BRIEF
+        # Position of turn number `summarized` in the buffer (older turns may have dropped off)
+        first = max(0, len(history) - (turn_count - summarized))
+        last = len(history) - (turn_count - fold_through)
+        turns_text = "\n".join(conversation_history.render_turn(turn) for turn in history[first:last])
+        previous = state.get("project_brief") or project_brief.empty_brief()
+        project_info = state["project_info"]
+
+        try:
+            raw_response = await llm_service.generate(
+                project_brief.build_prompt(previous, turns_text, project_info),
+                generation_config_override=genai.types.GenerationConfig(
+                    temperature=0.2,
+                    response_mime_type='application/json'
+                ),
+                system_instruction=prompts.PROJECT_BRIEF.system,
+                priority=llm_scheduler.PRIORITY_BACKGROUND
+            )
+        except Exception as e:
+            print(f"[Session: {session_id}] Summarization failed: {e}")
+            return
+        brief = project_brief.parse(raw_response, previous)
+        if brief == previous:
+            print(f"[Session: {session_id}] Summarization produced no update")
+            return
+
+        # Re-read the state: the session may have moved on while the model was working
+        active = session_id in self._active_sessions
         state = self.get_session_state(session_id)
-        return "\n".join(state["conversation_history"][-20:])  # Last 20 messages
+        state["project_brief"] = brief
+        state["summarized_turns"] = max(state.get("summarized_turns", 0), fold_through)
+        # Replace the folded-in project info, keeping anything appended since
+        newer_info = state["project_info"][len(project_info):].strip() if state["project_info"].startswith(project_info) else ""
+        state["project_info"] = " ".join(filter(None, [project_brief.as_project_info(brief), newer_info]))
+        if not active:
+            self.sessions.save(session_id, state)
+        print(f"[Session: {session_id}] Project brief updated through turn {fold_through}")
 
     async def handle_message(self, session_id: str, websocket: WebSocket, request: dict):
+        if session_id not in self._active_sessions:
+            self._active_sessions[session_id] = self.get_session_state(session_id)
+        self._active_counts[session_id] = self._active_counts.get(session_id, 0) + 1
+        try:
+            if request.get("type") == "analytics":
+                return await self._handle_message(session_id, websocket, request)
+            chat_lock = self._chat_locks.get(session_id)
+            if chat_lock is None:
+                chat_lock = self._chat_locks[session_id] = asyncio.Lock()
+            async with chat_lock:
+                return await self._handle_message(session_id, websocket, request)
+        finally:
+            self._active_counts[session_id] -= 1
+            if not self._active_counts[session_id]:
+                del self._active_counts[session_id]
+                self.sessions.save(session_id, self._active_sessions.pop(session_id))
+
+    async def _handle_message(self, session_id: str, websocket: WebSocket, request: dict):
         state = self.get_session_state(session_id)
         user_message = request.get("params", {}).get("message")
         request_id = request.get("requestId")
+        # Streaming mode: reply arrives as response_chunk frames, then a response_end frame
+        stream = bool(request.get("stream") or request.get("params", {}).get("stream"))
 
         print(f"\n--- Orchestrator ---")
         print(f"[Session: {session_id}] Received message: '{user_message}'")
@@ -54,6 +185,9 @@ class OrchestratorAgent:
         # Get conversation context
         conversation_context = self.get_conversation_context(session_id)
         
+        # Plan replies are kept in history as a short summary instead of the full JSON
+        history_kind, history_summary = "text", None
+
         # Check if waiting for confirmation to save plan
         if state["waiting_for_confirmation"]:
             if "yes" in user_message.lower() or "ok" in user_message.lower() or "sure" in user_message.lower():
@@ -76,41 +210,20 @@ class OrchestratorAgent:
                 response_content = "No problem! What would you like to change about the project plan, or would you like to start over?"
         else:
             # Main conversation handling
-            prompt = f"""You are a helpful project planning assistant. Guide users through a natural conversation to gather comprehensive project information before creating detailed plans.
-
-CURRENT DATE: December 11, 2025
-
-CONVERSATION CONTEXT:
-{conversation_context}
-
-USER'S CURRENT MESSAGE: "{user_message}"
-
-THREE-STAGE PLANNING APPROACH:
-1. **PROJECT BASICS** - Understand what they want to build, main purpose, target audience
-2. **FEATURES & REQUIREMENTS** - Dive into specific functionality, user interactions, key features
-3. **TECHNICAL DETAILS** - Discuss platform preferences, complexity, timeline, technology choices
+            prompt = prompts.CHAT_TURN.render(
+                conversation_context=conversation_context,
+                user_message=user_message
+            )
 
-CONVERSATION GUIDELINES:
-- Have a natural, friendly conversation
-- Ask follow-up questions to understand their vision better
-- Guide them through the three stages naturally
-- Only suggest creating a plan when you have comprehensive information across all areas or if the user wants you to
-- Be curious about their project and ask thoughtful questions
-- Help them think through aspects they might not have considered
-
-CURRENT FOCUS:
-- If they just shared a basic project idea, ask about target users and main goals
-- If you know the basics, explore specific features and functionality they envision
-- If you have features, discuss technical preferences and constraints
-- Only when all three areas are well-covered, offer to create the detailed plan
-
-Be conversational, ask good questions, and help them develop their project idea fully:"""
-
-            # Generate response
-            response = await llm_service.generate(prompt)
-            
-            # Check if we should generate a project plan
-            should_generate_plan = await self._should_generate_plan(session_id, user_message, conversation_context)
+            # Generate the reply and the plan readiness decision in one round trip
+            if stream:
+                response, should_generate_plan = await self._generate_turn_streaming(
+                    session_id, websocket, request_id, prompt, user_message, conversation_context
+                )
+            else:
+                response, should_generate_plan = await self._generate_turn(
+                    session_id, prompt, user_message, conversation_context
+                )
             
             if should_generate_plan:
                 # Accumulate project information
@@ -123,25 +236,30 @@ Be conversational, ask good questions, and help them develop their project idea
                 
                 # Generate the project plan
                 try:
-                    plan_response = await self.recommendations_agent.handle(state["project_info"])
-                    
-                    # Clean up JSON response
-                    if plan_response.strip().startswith("```json"):
-                        plan_response = plan_response.strip()[7:-3]
-                    elif plan_response.strip().startswith("```"):
-                        plan_response = plan_response.strip()[3:-3]
+                    if stream:
+                        plan_response = await self._generate_plan_streaming(
+                            session_id, websocket, request_id, state["project_info"]
+                        )
+                    else:
+                        plan_response = await self.recommendations_agent.handle(state["project_info"])
                     
-                    plan_data = json.loads(plan_response)
+                    # Parse JSON response, tolerating ```json fences
+                    plan_data = loads_lenient(plan_response)
                     state["generated_plan"] = plan_data
                     state["waiting_for_confirmation"] = True
                     
                     # Format plan for display
                     plan_text = json.dumps(plan_data, indent=2)
                     response_content = f"Based on our conversation, I've created a detailed project plan for you:\n\n{plan_text}\n\nWould you like me to save this plan?"
+                    history_kind = "plan"
+                    history_summary = conversation_history.summarize_plan(plan_data) + " Asked whether to save it."
                     
                 except json.JSONDecodeError as e:
                     print(f"[Session: {session_id}] Error parsing plan JSON: {e}")
-                    response_content = "I had trouble generating the project plan. Could you provide a bit more detail about what you want to build?"
+                    response_content = PLAN_FAILED_REPLY
+                except llm_service.LLMTimeoutError as e:
+                    print(f"[Session: {session_id}] Plan generation timed out: {e}")
+                    response_content = PLAN_FAILED_REPLY
             else:
                 # Regular conversation - accumulate project info if relevant
                 if self._is_project_related(user_message):
@@ -153,12 +271,105 @@ Be conversational, ask good questions, and help them develop their project idea
                 response_content = response
 
         # Add assistant response to conversation history
-        self.add_to_conversation(session_id, response_content, is_user=False)
+        self.add_to_conversation(session_id, response_content, is_user=False,
+                                 kind=history_kind, summary=history_summary)
         
-        # Send response
+        # Send response (when streaming, response_end carries the complete text for history)
         response_data = {"content": response_content}
         print(f"[Session: {session_id}] Sending response")
-        await websocket.send_json({"event": "response", "data": response_data, "requestId": request_id, "sessionId": session_id})
+        event = "response_end" if stream else "response"
+        await websocket.send_json({"event": event, "data": response_data, "requestId": request_id, "sessionId": session_id})
+
+        # Compress older history in the background so the next prompts stay small
+        self._maybe_summarize(session_id)
+
+    async def _generate_turn(self, session_id: str, prompt: str, message: str, context: str):
+        """Get the chat reply and whether to generate a plan from a single LLM call."""
+        try:
+            raw_response = await llm_service.generate(
+                prompt,
+                generation_config_override=genai.types.GenerationConfig(response_mime_type='application/json'),
+                system_instruction=prompts.CHAT_TURN.system
+            )
+        except llm_service.LLMTimeoutError as e:
+            print(f"[Session: {session_id}] Chat reply timed out: {e}")
+            return CHAT_TIMEOUT_REPLY, False
+        return await self._parse_turn(session_id, raw_response, message, context)
+
+    async def _generate_turn_streaming(self, session_id: str, websocket: WebSocket, request_id,
+                                       prompt: str, message: str, context: str):
+        """Like _generate_turn, but forwards the reply to the client as it is generated."""
+        extractor = JsonStringFieldExtractor("reply")
+        chunks = []
+        async for chunk in llm_service.generate_stream(
+            prompt,
+            generation_config_override=genai.types.GenerationConfig(response_mime_type='application/json'),
+            system_instruction=prompts.CHAT_TURN.system
+        ):
+            chunks.append(chunk)
+            text = extractor.feed(chunk)
+            if text:
+                await websocket.send_json({
+                    "event": "response_chunk",
+                    "data": {"content": text},
+                    "requestId": request_id,
+                    "sessionId": session_id
+                })
+        if chunks and llm_service.is_error_response(chunks[-1]):
+            # The stream failed part-way: report the failure, not the fragment
+            return await self._parse_turn(session_id, chunks[-1], message, context)
+        return await self._parse_turn(session_id, "".join(chunks), message, context)
+
+    async def _generate_plan_streaming(self, session_id: str, websocket: WebSocket, request_id, project_info: str) -> str:
+        """Generate the plan, sending each milestone and task as a plan_item frame once complete."""
+        extractor = JsonArrayItemExtractor(("milestones", "tasks"))
+        counts = {"milestones": 0, "tasks": 0}
+        async for chunk in self.recommendations_agent.handle_stream(project_info):
+            for field, item in extractor.feed(chunk):
+                await websocket.send_json({
+                    "event": "plan_item",
+                    "data": {
+                        "kind": "milestone" if field == "milestones" else "task",
+                        "index": counts[field],
+                        "item": item
+                    },
+                    "requestId": request_id,
+                    "sessionId": session_id
+                })
+                counts[field] += 1
+        print(f"[Session: {session_id}] Streamed {counts['milestones']} milestones and {counts['tasks']} tasks")
+        return extractor.text
+
+    async def _parse_turn(self, session_id: str, raw_response: str, message: str, context: str):
+        """Split a structured turn into (reply, should_generate_plan)."""
+        if llm_service.is_error_response(raw_response):
+            # Not a reply the model chose to format differently: don't show the
+            # error to the user or spend a second call on plan readiness
+            print(f"[Session: {session_id}] Chat reply failed: {raw_response}")
+            return CHAT_ERROR_REPLY, False
+        try:
+            turn = json.loads(raw_response)
+            reply = str(turn["reply"])
+        except (json.JSONDecodeError, KeyError, TypeError):
+            # Model ignored the format: use the text as the reply and ask separately
+            print(f"[Session: {session_id}] Structured reply unavailable, checking plan readiness separately")
+            return raw_response, await self._should_generate_plan(session_id, message, context)
+        
+        # The model's flag came with the reply for free; the local classifier
+        # may only veto it (too early, or the user asked not to plan yet)
+        if self._local_plan_readiness(session_id, message) is False:
+            return reply, False
+        return reply, bool(turn.get("ready_for_plan", False))
+
+    def _local_plan_readiness(self, session_id: str, message: str):
+        """Model-free readiness check: True/False when clear, None when ambiguous.
+
+        Only turns since the last shared plan count, so a finished planning
+        conversation does not keep triggering new plans.
+        """
+        state = self.get_session_state(session_id)
+        user_messages = conversation_history.user_messages_since_plan(state["conversation_history"])
+        return plan_readiness.classify(user_messages, message)
 
     async def _should_generate_plan(self, session_id: str, message: str, context: str) -> bool:
         """Determine if we have enough information to generate a project plan."""
@@ -168,35 +379,23 @@ Be conversational, ask good questions, and help them develop their project idea
         if state["waiting_for_confirmation"]:
             return False
         
+        # Only escalate to the LLM when the local classifier can't tell
+        local_decision = self._local_plan_readiness(session_id, message)
+        if local_decision is not None:
+            return local_decision
+        
         # Check if we have comprehensive project information across all three stages
-        prompt = f"""Analyze if the user has provided COMPREHENSIVE information across these three key areas to create a detailed project plan:
-
-1. **PROJECT BASICS**: What they want to build, main purpose, target users
-2. **FEATURES & REQUIREMENTS**: Key functionality, specific features, user interactions  
-3. **TECHNICAL PREFERENCES**: Platform preferences, complexity level, timeline expectations
-
-CONVERSATION CONTEXT:
-{context}
-
-CURRENT MESSAGE: "{message}"
-
-ACCUMULATED PROJECT INFO: "{state['project_info']}"
-
-Respond with "YES" ONLY if:
-- All three areas above have been discussed with sufficient detail
-- The user has provided specific features and functionality requirements
-- There's enough information to create a comprehensive technical plan
-- The conversation has naturally progressed through requirements gathering
-
-Respond with "NO" if:
-- Missing details in any of the three key areas
-- Only basic project idea has been shared
-- Need more clarification on features, technical aspects, or requirements
-- The conversation is still in early stages
+        prompt = prompts.PLAN_READINESS.render(
+            conversation_context=context,
+            user_message=message,
+            project_info=state["project_info"]
+        )
 
-Respond with ONLY: YES or NO"""
-
-        response = await llm_service.generate(prompt)
+        try:
+            response = await llm_service.generate(prompt, system_instruction=prompts.PLAN_READINESS.system)
+        except llm_service.LLMTimeoutError as e:
+            print(f"[Session: {session_id}] Plan readiness check timed out: {e}")
+            return False
         return "YES" in response.upper()
 
     def _is_project_related(self, message: str) -> bool:
@@ -216,12 +415,30 @@ Respond with ONLY: YES or NO"""
             
             print(f"[Session: {session_id}] Analytics request - Action: {action}")
             
+            # Progressive mode: the first result goes out as analytics_response
+            # as soon as it is ready, the complete one follows as analytics_update
+            progressive = bool(request.get("progressive") or data.get("progressive"))
+            sent_initial = False
+
+            async def send_initial(partial_response):
+                nonlocal sent_initial
+                print(f"[Session: {session_id}] Sending initial analytics response")
+                await websocket.send_json({
+                    "event": "analytics_response",
+                    "sessionId": session_id,
+                    "requestId": request_id,
+                    "data": partial_response
+                })
+                sent_initial = True
+
             # Route to analytics agent
-            analytics_response = await self.analytics_agent.handle(action, data)
+            analytics_response = await self.analytics_agent.handle(
+                action, data, on_progress=send_initial if progressive else None
+            )
             
             # Send response back through WebSocket
             response_data = {
-                "event": "analytics_response",
+                "event": "analytics_update" if sent_initial else "analytics_response",
                 "sessionId": session_id,
                 "requestId": request_id,
                 "data": analytics_response
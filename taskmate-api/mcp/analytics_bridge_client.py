@@ -0,0 +1,246 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+
+# Path to the Node.js bridge that wraps AnalyticsService
+BRIDGE_SCRIPT = os.path.join(os.path.dirname(__file__), '../analytics_bridge.js')
+BRIDGE_WORKERS = int(os.getenv('ANALYTICS_BRIDGE_WORKERS', '2'))
+BRIDGE_TIMEOUT = float(os.getenv('ANALYTICS_BRIDGE_TIMEOUT', '10'))
+# Requests a single worker may have outstanding; further callers wait their turn
+BRIDGE_MAX_IN_FLIGHT = int(os.getenv('ANALYTICS_BRIDGE_MAX_IN_FLIGHT', '32'))
+# A worker that exits before answering anything (e.g. a missing Node module)
+# is not restarted for this long, doubling per failed start up to the max
+BRIDGE_RESTART_BACKOFF = float(os.getenv('ANALYTICS_BRIDGE_RESTART_BACKOFF', '1'))
+BRIDGE_RESTART_BACKOFF_MAX = float(os.getenv('ANALYTICS_BRIDGE_RESTART_BACKOFF_MAX', '60'))
+
+# Responses such as team summaries can be larger than asyncio's 64 KiB default
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class BridgeError(Exception):
+    """Raised when the Node.js bridge cannot serve a request."""
+
+
+class BridgeWorker:
+    """A single long-lived `node analytics_bridge.js --serve` process.
+
+    Requests are written as JSON lines tagged with an id and responses are
+    matched back to their callers by that id, so many calls can be in flight
+    on one process at the same time. Nothing here blocks the event loop.
+    """
+
+    def __init__(self, script_path: str, name: str, max_in_flight: int = BRIDGE_MAX_IN_FLIGHT):
+        self.script_path = script_path
+        self.name = name
+        self.command = ['node', script_path, '--serve']
+        self.process = None
+        self.restarts = 0
+        self.failed_starts = 0  # consecutive processes that exited without answering
+        self._retry_at = 0.0
+        self._pending = {}
+        self._queued = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._ids = itertools.count(1)
+        self._reader_task = None
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        # Without its reader a process can take requests but never answer them
+        return (self.process is not None and self.process.returncode is None
+                and self._reader_task is not None and not self._reader_task.done())
+
+    @property
+    def load(self) -> int:
+        return len(self._pending) + self._queued
+
+    async def ensure_started(self):
+        """Start the process, or restart it if it has died.
+
+        While a worker that keeps failing to start is cooling down, raises
+        BridgeError at once instead of spawning another process.
+        """
+        if self.alive:
+            return
+        async with self._start_lock:
+            if self.alive:
+                return
+            wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                raise BridgeError(f"Analytics bridge {self.name} failed to start, retrying in {wait:.1f}s")
+            if self.process is not None:
+                self.restarts += 1
+                print(f"Analytics bridge {self.name} exited, restarting (restart #{self.restarts})")
+            # Each process gets its own pending table so a dying reader can
+            # only fail the calls that were actually sent to it
+            self._pending = {}
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=STREAM_LIMIT
+            )
+            self._reader_task = asyncio.create_task(self._read_responses(self.process, self._pending))
+            asyncio.create_task(self._drain_stderr(self.process))
+            print(f"Analytics bridge {self.name} started (pid {self.process.pid})")
+
+    async def call(self, method: str, params: dict, timeout: float):
+        """Send one request and wait for its response.
+
+        The timeout covers queueing for a free slot as well as the call
+        itself. If the caller is cancelled or times out, the bridge is told
+        to drop the request so it does not write a response nobody reads.
+        """
+        return await asyncio.wait_for(self._call(method, params), timeout)
+
+    async def _call(self, method: str, params: dict):
+        # Count ourselves while queued so concurrent callers spread out
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+
+        request_id = None
+        pending = None
+        try:
+            await self.ensure_started()
+
+            request_id = next(self._ids)
+            future = asyncio.get_running_loop().create_future()
+            pending = self._pending
+            pending[request_id] = future
+            if self._reader_task.done():
+                # The process died after ensure_started; nobody would answer
+                raise BridgeError(f"Analytics bridge {self.name} exited")
+
+            self._send({"id": request_id, "method": method, "params": params})
+            # Backpressure: wait while the bridge is not reading its stdin
+            await self.process.stdin.drain()
+            return await future
+        except asyncio.CancelledError:
+            if request_id is not None and request_id in pending:
+                try:
+                    self._send({"cancel": request_id})
+                except (BridgeError, BrokenPipeError, ConnectionResetError):
+                    pass
+            raise
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise BridgeError(f"Analytics bridge {self.name} is not accepting requests: {e}")
+        finally:
+            if pending is not None:
+                pending.pop(request_id, None)
+            self._slots.release()
+
+    def _send(self, message: dict):
+        if not self.alive:
+            raise BridgeError(f"Analytics bridge {self.name} exited")
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+
+    async def _read_responses(self, process, pending):
+        """Resolve pending calls as response lines arrive.
+
+        A bad line is logged and skipped. A line over STREAM_LIMIT is skipped
+        too; the call it answered runs into its timeout.
+        """
+        answered = False
+        try:
+            while True:
+                try:
+                    line = await process.stdout.readline()
+                except ValueError as e:
+                    print(f"Analytics bridge {self.name} sent a response over {STREAM_LIMIT} bytes, skipped: {e}")
+                    continue
+                if not line:
+                    break
+                try:
+                    response = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    response = None
+                if not isinstance(response, dict):
+                    print(f"Analytics bridge {self.name} sent invalid output: {line[:200]!r}")
+                    continue
+
+                answered = True
+                request_id = response.get("id")
+                future = pending.get(request_id) if isinstance(request_id, int) else None
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(BridgeError(response["error"]))
+                else:
+                    future.set_result(response.get("result"))
+        finally:
+            # Nothing in flight on this process will ever be answered. Make
+            # sure it is gone too, so the next call starts a fresh one
+            if process.returncode is None:
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+            self._record_exit(answered)
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(BridgeError(f"Analytics bridge {self.name} exited"))
+
+    def _record_exit(self, answered: bool):
+        """Back off restarts of a process that died without answering anything."""
+        if answered:
+            self.failed_starts = 0
+            self._retry_at = 0.0
+            return
+        self.failed_starts += 1
+        delay = min(BRIDGE_RESTART_BACKOFF * 2 ** (self.failed_starts - 1), BRIDGE_RESTART_BACKOFF_MAX)
+        self._retry_at = time.monotonic() + delay
+        print(f"Analytics bridge {self.name} exited without answering, not restarting for {delay:.1f}s")
+
+    async def _drain_stderr(self, process):
+        """Forward the bridge's logging so its pipe never fills up."""
+        while True:
+            line = await process.stderr.readline()
+            if not line:
+                break
+            print(f"[bridge {self.name}] {line.decode(errors='replace').rstrip()}")
+
+    async def stop(self):
+        if not self.alive:
+            return
+        self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), 5)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+
+class AnalyticsBridge:
+    """Small supervised pool of persistent bridge workers.
+
+    Workers are started lazily on first use and restarted on the next call
+    after they exit, with a growing cooldown if they keep dying before
+    answering. Each call goes to the least busy worker.
+    """
+
+    def __init__(self, script_path: str = BRIDGE_SCRIPT, workers: int = BRIDGE_WORKERS,
+                 timeout: float = BRIDGE_TIMEOUT):
+        self.script_path = script_path
+        self.timeout = timeout
+        self.workers = [BridgeWorker(script_path, str(i)) for i in range(max(1, workers))]
+
+    @property
+    def available(self) -> bool:
+        return os.path.exists(self.script_path)
+
+    async def call(self, method: str, params: dict, timeout: float = None):
+        """Call a bridge method and return its decoded result."""
+        if not self.available:
+            raise BridgeError(f"Analytics bridge script not found: {self.script_path}")
+
+        worker = min(self.workers, key=lambda w: w.load)
+        return await worker.call(method, params, timeout or self.timeout)
+
+    async def close(self):
+        await asyncio.gather(*(worker.stop() for worker in self.workers), return_exceptions=True)
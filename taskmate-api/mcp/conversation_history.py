@@ -0,0 +1,92 @@
+"""Structured conversation history and token-budgeted prompt context.
+
+Turns are kept in a bounded deque as plain dicts ({"role", "content",
+"kind", "summary"}) so they stay JSON-serializable for the session store.
+When building prompt context, the newest turns are taken first until the
+token budget runs out; plan turns are replaced by their one-line summary
+and long messages are cut down.
+"""
+import os
+from collections import deque
+
+HISTORY_MAX_TURNS = int(os.getenv('HISTORY_MAX_TURNS', '40'))
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
+# No single turn may take more than this many tokens of the budget
+CONTEXT_TURN_TOKEN_LIMIT = int(os.getenv('CONTEXT_TURN_TOKEN_LIMIT', '400'))
+
+SPEAKERS = {"user": "User", "assistant": "Assistant"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def make_turn(role: str, content: str, kind: str = "text", summary: str = None) -> dict:
+    turn = {"role": role, "content": content, "kind": kind}
+    if summary:
+        turn["summary"] = summary
+    return turn
+
+
+def _upgrade(entry):
+    # Sessions saved before turns were structured hold "User: ..." strings
+    if isinstance(entry, dict):
+        return entry
+    speaker, _, content = str(entry).partition(": ")
+    return make_turn("user" if speaker == "User" else "assistant", content)
+
+
+def new_history(turns=(), maxlen: int = HISTORY_MAX_TURNS) -> deque:
+    return deque((_upgrade(turn) for turn in turns), maxlen=maxlen)
+
+
+def summarize_plan(plan_data: dict) -> str:
+    """One-line stand-in for a generated plan in later prompts."""
+    plan = plan_data.get("recommendations", plan_data) if isinstance(plan_data, dict) else {}
+    name = plan.get("project_name") or "project"
+    milestones = plan.get("milestones") or []
+    tasks = plan.get("tasks") or []
+    milestone_names = ", ".join(str(m.get("name", "")) for m in milestones if isinstance(m, dict))
+    summary = f"[Shared a project plan for '{name}' with {len(milestones)} milestones and {len(tasks)} tasks"
+    if milestone_names:
+        summary += f": {milestone_names}"
+    return summary + "]"
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + " [...]"
+
+
+def render_turn(turn: dict, max_tokens: int = CONTEXT_TURN_TOKEN_LIMIT) -> str:
+    content = turn.get("summary") or turn["content"]
+    return f"{SPEAKERS.get(turn['role'], turn['role'])}: {_truncate(content, max_tokens)}"
+
+
+def user_messages(history) -> list:
+    return [turn["content"] for turn in history if turn["role"] == "user"]
+
+
+def user_messages_since_plan(history) -> list:
+    """User messages after the last plan the assistant shared (all of them if none)."""
+    turns = list(history)
+    start = next((index + 1 for index in range(len(turns) - 1, -1, -1) if turns[index].get("kind") == "plan"), 0)
+    return user_messages(turns[start:])
+
+
+def build_context(history, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Render the most recent turns that fit in token_budget, oldest first."""
+    lines = []
+    remaining = token_budget
+    for turn in reversed(history):
+        line = render_turn(turn, min(CONTEXT_TURN_TOKEN_LIMIT, remaining))
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+    lines.reverse()
+    return "\n".join(lines)
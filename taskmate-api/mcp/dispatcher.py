@@ -0,0 +1,125 @@
+import asyncio
+import os
+
+# Requests one websocket connection may have running at once
+MAX_IN_FLIGHT_PER_CONNECTION = int(os.getenv('WS_MAX_IN_FLIGHT', '8'))
+
+# Analytics actions where only the latest request matters (they call the LLM);
+# writes such as record_task_assignment are never superseded
+SUPERSEDABLE_ANALYTICS_ACTIONS = {
+    "get_task_assignment_recommendations", "get_org_assignment_recommendations", "bulk_assignment_recommendations",
+    "test_recommendations"
+}
+
+
+def request_kind(request: dict):
+    """Kind used for superseding, or None when requests of this type never replace each other."""
+    if request.get("type") == "analytics":
+        action = request.get("action")
+        return f"analytics:{action}" if action in SUPERSEDABLE_ANALYTICS_ACTIONS else None
+    return "chat"
+
+
+class SerializedWebSocket:
+    """Wraps a WebSocket so concurrent handlers never interleave sends."""
+
+    def __init__(self, websocket):
+        self._websocket = websocket
+        self._send_lock = asyncio.Lock()
+
+    async def send_json(self, data):
+        async with self._send_lock:
+            await self._websocket.send_json(data)
+
+
+class ConnectionDispatcher:
+    """Runs each message of one connection as its own task.
+
+    Responses are correlated by the request's requestId. Ordering between
+    chat messages of a session is enforced by the orchestrator; everything
+    else (e.g. analytics polls) runs as soon as it arrives, up to
+    `max_in_flight` requests per connection.
+
+    A `{"type": "cancel", "requestId": ...}` message cancels that request,
+    and a new request of the same kind in a session (see request_kind)
+    cancels the previous one unless it is sent with `"supersede": false`.
+    Cancelling the task aborts the pending model call or stream with it.
+    """
+
+    def __init__(self, websocket, handler, max_in_flight: int = MAX_IN_FLIGHT_PER_CONNECTION):
+        self.websocket = SerializedWebSocket(websocket)
+        self._handler = handler
+        self.max_in_flight = max_in_flight
+        self._tasks = {}  # task -> requestId
+        self._latest = {}  # (session_id, kind) -> task
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def dispatch(self, session_id: str, request: dict):
+        request_id = request.get("requestId")
+        if request.get("type") == "cancel":
+            await self.cancel(session_id, request_id)
+            return
+
+        kind = request_kind(request)
+        if kind and request.get("supersede", True):
+            previous = self._latest.get((session_id, kind))
+            if previous in self._tasks:
+                await self._cancel_task(session_id, previous, "superseded")
+
+        if len(self._tasks) >= self.max_in_flight:
+            await self.websocket.send_json({
+                "error": f"Too many requests in flight (max {self.max_in_flight}).",
+                "requestId": request_id
+            })
+            return
+        task = asyncio.create_task(self._run(session_id, request))
+        self._tasks[task] = request_id
+        task.add_done_callback(lambda done: self._tasks.pop(done, None))
+        if kind:
+            self._latest[(session_id, kind)] = task
+            task.add_done_callback(lambda _: self._forget_latest(session_id, kind, task))
+
+    async def cancel(self, session_id: str, request_id):
+        """Cancel the in-flight request with this requestId, if it is still running."""
+        task = next((task for task, task_request_id in self._tasks.items() if task_request_id == request_id), None)
+        if task is None:
+            print(f"[Session: {session_id}] Nothing to cancel for request {request_id}")
+            return
+        await self._cancel_task(session_id, task, "cancelled")
+
+    async def _cancel_task(self, session_id: str, task, reason: str):
+        # Stop counting it now: its done-callback only runs on a later loop
+        # iteration, and the request replacing it must not hit the cap
+        request_id = self._tasks.pop(task, None)
+        task.cancel()
+        print(f"[Session: {session_id}] Request {request_id} {reason}")
+        await self.websocket.send_json({
+            "event": "cancelled",
+            "data": {"reason": reason},
+            "requestId": request_id,
+            "sessionId": session_id
+        })
+
+    def _forget_latest(self, session_id: str, kind: str, task):
+        if self._latest.get((session_id, kind)) is task:
+            del self._latest[(session_id, kind)]
+
+    async def _run(self, session_id: str, request: dict):
+        try:
+            await self._handler(session_id, self.websocket, request)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error_message = f"An unexpected error occurred: {e}"
+            print(error_message)
+            await self.websocket.send_json({"error": error_message, "requestId": request.get("requestId")})
+
+    async def close(self):
+        """Cancel whatever is still running for this connection."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from ttl_cache import TTLCache
+
+LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'memory')  # memory | sqlite
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'llm_cache.sqlite3'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', '3600'))
+LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', '512'))
+
+
+def _config_to_dict(generation_config):
+    if generation_config is None:
+        return None
+    if isinstance(generation_config, dict):
+        return generation_config
+    return {k: v for k, v in vars(generation_config).items() if v is not None}
+
+
+def make_cache_key(model_name: str, prompt: str, generation_config=None, system_instruction: str = None) -> str:
+    """Stable key for a (model, system instruction, prompt, generation_config) call."""
+    payload = json.dumps(
+        [model_name, system_instruction, prompt, _config_to_dict(generation_config)],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class MemoryResponseCache:
+    """Process-local response cache."""
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL):
+        self._cache = TTLCache(maxsize, ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class SQLiteResponseCache:
+    """On-disk response cache that survives restarts and is shared by workers."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, maxsize: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now)
+            )
+            # Drop expired rows, then the least recently used beyond maxsize
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key NOT IN"
+                " (SELECT key FROM responses ORDER BY accessed_at DESC LIMIT ?)",
+                (self.maxsize,)
+            )
+
+    def clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"backend": "sqlite", "size": size, "hits": self.hits, "misses": self.misses}
+
+
+def create_response_cache(backend: str = LLM_CACHE_BACKEND):
+    if backend == 'sqlite':
+        return SQLiteResponseCache()
+    return MemoryResponseCache()
@@ -0,0 +1,273 @@
+"""Process-wide scheduler for model calls.
+
+Bounds how many Gemini requests run at once and how many requests and
+tokens are sent per minute. Waiting calls are admitted by priority class,
+so interactive chat is served before plan generation, analytics and
+background work. Rate-limit (429) errors are retried with exponential
+backoff and full jitter, and each one halves the request rate, which then
+recovers gradually as calls succeed.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PLAN = 1
+PRIORITY_ANALYTICS = 2
+PRIORITY_BACKGROUND = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_PLAN: "plan",
+    PRIORITY_ANALYTICS: "analytics",
+    PRIORITY_BACKGROUND: "background",
+}
+
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv('LLM_REQUESTS_PER_MINUTE', '60'))
+LLM_TOKENS_PER_MINUTE = float(os.getenv('LLM_TOKENS_PER_MINUTE', '250000'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '4'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '1'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '30'))
+# Output tokens assumed per call when charging the token bucket up front
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv('LLM_OUTPUT_TOKEN_ESTIMATE', '800'))
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Tokens to reserve for a call: ~4 characters per prompt token plus expected output."""
+    return len(prompt) // 4 + LLM_OUTPUT_TOKEN_ESTIMATE
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for provider quota errors (google.api_core ResourceExhausted / HTTP 429)."""
+    if getattr(error, "code", None) == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for server-side failures that are worth retrying (5xx, upstream deadline)."""
+    if getattr(error, "code", None) in (500, 502, 503, 504):
+        return True
+    return type(error).__name__ in ("ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "BadGateway")
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per priority class, for hedging delays."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+
+    def record(self, key, seconds: float):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, key, pct: float):
+        """Latency at `pct` (0-100), or None until enough calls have been seen."""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def stats(self) -> dict:
+        result = {}
+        for key, samples in self._samples.items():
+            ordered = sorted(samples)
+            result[PRIORITY_NAMES.get(key, str(key))] = {
+                "samples": len(ordered),
+                "p50": round(ordered[len(ordered) // 2], 3),
+                "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            }
+        return result
+
+
+class TokenBucket:
+    """Refills continuously at `rate_per_minute` up to `capacity`."""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate_per_minute / 60)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)."""
+        self._refill()
+        # A single request larger than the bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) * 60 / self.rate_per_minute
+
+    def take(self, amount: float):
+        self._refill()
+        self._level -= amount
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX):
+        self.max_concurrency = max_concurrency
+        self.max_requests_per_minute = requests_per_minute
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self._paused_until = 0.0
+        self._waiting = []  # heap of (priority, seq, tokens, future)
+        self._seq = itertools.count()
+        self._wake = None
+        self._pump_task = None
+
+    # --- admission -----------------------------------------------------
+
+    def _ensure_pump(self):
+        loop = asyncio.get_running_loop()
+        if self._pump_task is None or self._pump_task.done() or self._pump_task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._pump_task = loop.create_task(self._pump())
+
+    async def _sleep_until_woken(self, timeout: float = None):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _pump(self):
+        """Admit the highest-priority waiter whenever a slot and rate budget are free."""
+        while True:
+            while self._waiting and self._waiting[0][3].done():
+                heapq.heappop(self._waiting)  # cancelled while queued
+            if not self._waiting or self.in_flight >= self.max_concurrency:
+                await self._sleep_until_woken()
+                continue
+
+            _, _, tokens, future = self._waiting[0]
+            delay = max(
+                self._paused_until - time.monotonic(),
+                self.requests.delay(1),
+                self.tokens.delay(tokens)
+            )
+            if delay > 0:
+                await self._sleep_until_woken(delay)
+                continue
+
+            heapq.heappop(self._waiting)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def acquire(self, priority: int, tokens: int):
+        self._ensure_pump()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), tokens, future))
+        self._wake.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # admitted just as we were cancelled
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake.set()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE, tokens: int = LLM_OUTPUT_TOKEN_ESTIMATE):
+        """Hold one admitted call for the duration of the block (e.g. a whole stream)."""
+        await self.acquire(priority, tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # --- rate-limit handling -------------------------------------------
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def on_rate_limited(self, delay: float):
+        """Hold every queued call for `delay` and halve the request rate."""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self.requests.rate_per_minute = max(1.0, self.requests.rate_per_minute / 2)
+
+    def retry_delay(self, error: Exception, attempt: int):
+        """Backoff before retrying after `error`, or None if it should not be retried."""
+        if not is_rate_limit_error(error) or attempt >= self.max_retries:
+            return None
+        delay = self.backoff_delay(attempt)
+        self.on_rate_limited(delay)
+        self.retries += 1
+        print(f"LLM rate limited, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def on_success(self):
+        self.completed += 1
+        # Recover towards the configured rate a little with every success
+        step = max(1.0, self.max_requests_per_minute / 20)
+        self.requests.rate_per_minute = min(self.max_requests_per_minute, self.requests.rate_per_minute + step)
+
+    async def run(self, call, priority: int = PRIORITY_INTERACTIVE, tokens: int = LLM_OUTPUT_TOKEN_ESTIMATE):
+        """Await call() once admitted, retrying on rate-limit errors."""
+        attempt = 0
+        while True:
+            async with self.slot(priority, tokens):
+                try:
+                    result = await call()
+                except Exception as e:
+                    delay = self.retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self.on_success()
+                    return result
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, future in self._waiting:
+            if not future.done():
+                queued[PRIORITY_NAMES.get(priority, str(priority))] += 1
+        return {
+            "queued": queued,
+            "queue_depth": sum(queued.values()),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "completed": self.completed,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "requests_per_minute": round(self.requests.rate_per_minute, 2),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+        }
@@ -1,28 +1,228 @@
 import os
+import json
+import asyncio
+import time
 import google.generativeai as genai
-from dotenv import load_dotenv
+from dotenv import find_dotenv, load_dotenv
+
+import llm_cache
+import llm_scheduler
+from llm_scheduler import PRIORITY_INTERACTIVE
 
 # Load environment variables at the module level
-load_dotenv()
+ENV_FILE = find_dotenv()
+load_dotenv(ENV_FILE or None)
 API_KEY = os.getenv('GOOGLE_API_KEY', os.getenv('LLM_API_KEY'))
+DEFAULT_MODEL = 'gemini-2.5-flash'
+
+# Models are built once per (model name, system instruction, safety settings)
+# and reused; they all share the client set up by genai.configure().
+_models = {}
+_configured_api_key = None
+_active_model_name = None
+
+# Edits to ENV_FILE (e.g. a new LLM_MODEL or key) are picked up without a
+# restart; its modification time is checked at most this often
+ENV_CHECK_INTERVAL = float(os.getenv('LLM_ENV_CHECK_INTERVAL', '5'))
+
+# Opt-in cache for deterministic calls (see generate(cache=True))
+response_cache = llm_cache.create_response_cache()
+
+# Bounds concurrent calls and request/token rates across every session
+scheduler = llm_scheduler.LLMScheduler()
+
+# Overall deadline for a generate() call, retries and hedges included
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+# Extra attempts after a timed-out or 5xx attempt (calls here are idempotent)
+LLM_RETRIES = int(os.getenv('LLM_RETRIES', '1'))
+# Percentile of recent latencies after which a hedged call fires its duplicate
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+
+latency = llm_scheduler.LatencyTracker()
+hedge_stats = {"fired": 0, "won": 0, "timeouts": 0}
+
+# generate()/generate_stream() report other failures in-band with these prefixes
+GENERATION_ERROR_PREFIX = "Error during text generation:"
+STREAM_ERROR_PREFIX = "Error during stream generation:"
 
-def get_configured_model(model_name_override=None):
-    """Creates and returns a model instance with explicit configuration."""
+class LLMTimeoutError(Exception):
+    """generate() could not finish before its deadline."""
+
+def is_error_response(text: str) -> bool:
+    """Whether `text` is a failure reported by generate() or generate_stream()."""
+    return isinstance(text, str) and text.startswith((GENERATION_ERROR_PREFIX, STREAM_ERROR_PREFIX))
+
+def _configure():
+    """Configure the genai client once per API key."""
+    global _configured_api_key
     if not API_KEY:
         raise ValueError("GOOGLE_API_KEY or LLM_API_KEY not found in environment.")
-    
-    genai.configure(api_key=API_KEY)
-    
-    model_name = model_name_override or os.getenv('LLM_MODEL', 'gemini-2.5-flash')
-    return genai.GenerativeModel(model_name)
-
-async def generate(prompt: str, generation_config_override: dict = None) -> str:
-    """Generates a non-streaming response from the model."""
+    if _configured_api_key != API_KEY:
+        genai.configure(api_key=API_KEY)
+        _configured_api_key = API_KEY
+        _models.clear()
+
+def _env_file_mtime():
     try:
-        model = get_configured_model()
-        response = await model.generate_content_async(
-            prompt,
-            generation_config=generation_config_override
+        return os.stat(ENV_FILE).st_mtime_ns if ENV_FILE else None
+    except OSError:
+        return None
+
+_env_mtime = _env_file_mtime()
+_env_checked_at = time.monotonic()
+
+def reload_if_env_changed() -> bool:
+    """Reload the configuration if ENV_FILE changed since it was last read."""
+    global _env_checked_at
+    now = time.monotonic()
+    if now - _env_checked_at < ENV_CHECK_INTERVAL:
+        return False
+    _env_checked_at = now
+    if _env_file_mtime() == _env_mtime:
+        return False
+    print(f"{ENV_FILE} changed, reloading LLM configuration")
+    reload_models()
+    return True
+
+def _registry_key(model_name, system_instruction, safety_settings):
+    settings = json.dumps(safety_settings, sort_keys=True, default=str) if safety_settings else None
+    return (model_name, system_instruction, settings)
+
+def get_configured_model(model_name_override=None, system_instruction=None, safety_settings=None):
+    """Returns a shared model instance for this configuration, building it on first use."""
+    global _active_model_name
+    reload_if_env_changed()
+    _configure()
+
+    model_name = model_name_override or os.getenv('LLM_MODEL', DEFAULT_MODEL)
+    if not model_name_override and model_name != _active_model_name:
+        # LLM_MODEL changed at runtime: drop models built for the previous default
+        if _active_model_name is not None:
+            print(f"LLM_MODEL changed from {_active_model_name} to {model_name}, reloading")
+            for key in [key for key in _models if key[0] == _active_model_name]:
+                del _models[key]
+        _active_model_name = model_name
+
+    key = _registry_key(model_name, system_instruction, safety_settings)
+    model = _models.get(key)
+    if model is None:
+        kwargs = {}
+        if system_instruction:
+            kwargs["system_instruction"] = system_instruction
+        if safety_settings:
+            kwargs["safety_settings"] = safety_settings
+        model = genai.GenerativeModel(model_name, **kwargs)
+        _models[key] = model
+    return model
+
+def reload_models():
+    """Re-read .env and rebuild the client and models on next use."""
+    global API_KEY, _configured_api_key, _env_mtime
+    _env_mtime = _env_file_mtime()
+    load_dotenv(ENV_FILE or None, override=True)
+    API_KEY = os.getenv('GOOGLE_API_KEY', os.getenv('LLM_API_KEY'))
+    _configured_api_key = None
+    _models.clear()
+
+def cache_stats() -> dict:
+    """Hit/miss counters for the response cache."""
+    return response_cache.stats()
+
+def scheduler_stats() -> dict:
+    """Queue depth per priority class, in-flight calls, rate-limit, latency and hedging counters."""
+    return {**scheduler.stats(), "latency": latency.stats(), "hedging": dict(hedge_stats)}
+
+async def _timed_call(model, prompt, generation_config, priority):
+    """One scheduled model call; records its latency (excluding queueing)."""
+    async def call():
+        start = time.monotonic()
+        response = await model.generate_content_async(prompt, generation_config=generation_config)
+        latency.record(priority, time.monotonic() - start)
+        return response
+    return await scheduler.run(call, priority=priority, tokens=llm_scheduler.estimate_tokens(prompt))
+
+async def _hedged_call(model, prompt, generation_config, priority):
+    """Fire a duplicate once the first call is slower than the recent p95; first result wins."""
+    hedge_delay = latency.percentile(priority, LLM_HEDGE_PERCENTILE)
+    first = asyncio.ensure_future(_timed_call(model, prompt, generation_config, priority))
+    if hedge_delay is None:
+        return await first
+    calls = {first}
+    try:
+        done, _ = await asyncio.wait(calls, timeout=hedge_delay)
+        if not done:
+            hedge_stats["fired"] += 1
+            calls.add(asyncio.ensure_future(_timed_call(model, prompt, generation_config, priority)))
+        while True:
+            done, pending = await asyncio.wait(calls, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((call for call in done if not call.exception()), None)
+            if winner is not None:
+                if winner is not first:
+                    hedge_stats["won"] += 1
+                return winner.result()
+            if not pending:
+                return done.pop().result()  # every attempt failed: raise the error
+            calls = pending
+    finally:
+        for call in calls:
+            call.cancel()
+
+async def _call_with_deadline(model, prompt, generation_config, priority, timeout, attempt_timeout, retries, hedge):
+    deadline = time.monotonic() + timeout
+    call = _hedged_call if hedge else _timed_call
+    for attempt in range(retries + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            return await asyncio.wait_for(
+                call(model, prompt, generation_config, priority),
+                min(remaining, attempt_timeout) if attempt_timeout else remaining
+            )
+        except asyncio.TimeoutError:
+            print(f"LLM attempt {attempt + 1}/{retries + 1} timed out")
+        except Exception as e:
+            if not llm_scheduler.is_transient_error(e) or attempt == retries:
+                raise
+            print(f"LLM attempt {attempt + 1}/{retries + 1} failed, retrying: {e}")
+    hedge_stats["timeouts"] += 1
+    raise LLMTimeoutError(f"no response within {timeout:.1f}s")
+
+async def generate(prompt: str, generation_config_override: dict = None, cache: bool = False,
+                   system_instruction: str = None, priority: int = PRIORITY_INTERACTIVE,
+                   timeout: float = None, attempt_timeout: float = None, retries: int = LLM_RETRIES,
+                   hedge: bool = False) -> str:
+    """Generates a non-streaming response from the model.
+
+    Pass cache=True for deterministic calls (low temperature, structured
+    output) to reuse a previous response for the same model, prompt and
+    generation config. A system_instruction (see prompts.py) selects a
+    model built once with that static instruction block. Calls are queued
+    by `priority` (see llm_scheduler) and retried on rate-limit errors.
+
+    The whole call must finish within `timeout` seconds (LLM_TIMEOUT by
+    default) or LLMTimeoutError is raised, so callers can fall back. An
+    attempt that exceeds `attempt_timeout` or fails with a 5xx is retried
+    up to `retries` times within that deadline. With hedge=True a duplicate
+    request is sent once the first is slower than the recent p95 latency.
+    """
+    try:
+        model = get_configured_model(system_instruction=system_instruction)
+        cache_key = None
+        if cache:
+            cache_key = llm_cache.make_cache_key(
+                model.model_name, prompt, generation_config_override, system_instruction
+            )
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        response = await _call_with_deadline(
+            model, prompt, generation_config_override, priority,
+            timeout=timeout or LLM_TIMEOUT,
+            attempt_timeout=attempt_timeout,
+            retries=retries,
+            hedge=hedge
         )
         
         # Debug: Print response details when blocked
@@ -35,24 +235,48 @@ async def generate(prompt: str, generation_config_override: dict = None) -> str:
                 print(f"  - Prompt feedback: {response.prompt_feedback}")
         
         if response.parts:
-            return response.parts[0].text.strip()
+            text = response.parts[0].text.strip()
+            if cache_key and text:
+                response_cache.set(cache_key, text)
+            return text
         return "" # Return empty string if blocked
+    except LLMTimeoutError:
+        raise
     except Exception as e:
         print(f"LLM Generation Error: {e}")
-        return f"Error during text generation: {e}"
+        return f"{GENERATION_ERROR_PREFIX} {e}"
+
+async def generate_stream(prompt: str, generation_config_override: dict = None, system_instruction: str = None,
+                          priority: int = PRIORITY_INTERACTIVE):
+    """Generates a streaming response from the model.
 
-async def generate_stream(prompt: str, generation_config_override: dict = None):
-    """Generates a streaming response from the model."""
+    The scheduler slot is held for the whole stream; a rate-limit error is
+    retried only if it happens before the first chunk.
+    """
     try:
-        model = get_configured_model()
-        response_stream = await model.generate_content_async(
-            prompt,
-            stream=True,
-            generation_config=generation_config_override
-        )
-        async for chunk in response_stream:
-            if chunk.parts:
-                yield chunk.parts[0].text
+        model = get_configured_model(system_instruction=system_instruction)
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with scheduler.slot(priority, llm_scheduler.estimate_tokens(prompt)):
+                    response_stream = await model.generate_content_async(
+                        prompt,
+                        stream=True,
+                        generation_config=generation_config_override
+                    )
+                    async for chunk in response_stream:
+                        if chunk.parts:
+                            started = True
+                            yield chunk.parts[0].text
+                scheduler.on_success()
+                return
+            except Exception as e:
+                delay = None if started else scheduler.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
     except Exception as e:
         print(f"LLM Stream Error: {e}")
-        yield f"Error during stream generation: {e}"
+        yield f"{STREAM_ERROR_PREFIX} {e}"
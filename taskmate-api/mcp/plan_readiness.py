@@ -0,0 +1,100 @@
+"""Local plan readiness classifier.
+
+Scores the user's side of a planning conversation against the three stages
+the orchestrator prompt walks through (project basics, features, technical
+details) and decides clear YES/NO cases without calling the model. Anything
+in between is reported as undecided so the caller can ask the LLM.
+"""
+import re
+
+STAGE_KEYWORDS = {
+    "basics": [
+        "app", "application", "website", "site", "platform", "tool", "system", "game",
+        "build", "create", "develop", "make", "idea", "purpose", "goal", "help",
+        "users", "customers", "students", "teachers", "clients", "audience", "people",
+        "business", "team", "community", "for my", "for our",
+    ],
+    "features": [
+        "feature", "features", "functionality", "login", "sign up", "signup", "register",
+        "account", "profile", "dashboard", "search", "filter", "upload", "download",
+        "notification", "notifications", "chat", "message", "payment", "payments",
+        "checkout", "cart", "calendar", "booking", "schedule", "report", "reports",
+        "admin", "comment", "share", "rating", "reviews", "map", "tracking", "track",
+        "able to", "can see", "can add", "can create", "should be able", "should allow",
+    ],
+    "technical": [
+        "react", "vue", "angular", "node", "python", "django", "flask", "fastapi", "java",
+        "spring", "flutter", "react native", "swift", "kotlin", "firebase", "aws", "azure",
+        "sql", "postgres", "mysql", "mongodb", "database", "api", "backend", "frontend",
+        "web", "mobile", "ios", "android", "desktop", "cloud", "hosting", "deploy",
+        "timeline", "deadline", "week", "weeks", "month", "months", "budget",
+        "beginner", "intermediate", "advanced", "simple", "complex", "stack", "framework",
+    ],
+}
+
+# The user is explicitly asking for the plan now
+EXPLICIT_REQUEST_PATTERNS = [
+    re.compile(r"\b(create|generate|make|build|draft|write|give me|show me)\b[\w\s]{0,20}\bplan\b"),
+    re.compile(r"\b(ready|go ahead)\b[\w\s]{0,15}\bplan\b"),
+    re.compile(r"\bplan (it|this) (out|now)\b"),
+]
+
+# The user is asking *not* to plan yet ("don't create a plan", "not yet")
+NEGATED_REQUEST_PATTERNS = [
+    re.compile(r"\b(don'?t|do not|not|never|no need to|hold off|wait)\b[\w\s']{0,30}\bplan\b"),
+    re.compile(r"\bnot (yet|now)\b"),
+]
+
+# Minimum distinct keyword hits for a stage to count as covered
+STAGE_THRESHOLD = 2
+# Below this many user turns the conversation is still too early
+MIN_USER_TURNS = 2
+# A clear YES needs this many user turns plus full coverage
+CONFIDENT_USER_TURNS = 3
+
+
+def _keyword_hits(text: str, keywords) -> int:
+    return sum(1 for keyword in keywords if re.search(r"\b" + re.escape(keyword) + r"\b", text))
+
+
+def score_stages(user_messages) -> dict:
+    """Distinct keyword hits per planning stage across the user's messages."""
+    text = " ".join(user_messages).lower()
+    return {stage: _keyword_hits(text, keywords) for stage, keywords in STAGE_KEYWORDS.items()}
+
+
+def is_negated_request(message: str) -> bool:
+    text = (message or "").lower()
+    return any(pattern.search(text) for pattern in NEGATED_REQUEST_PATTERNS)
+
+
+def is_explicit_request(message: str) -> bool:
+    text = (message or "").lower()
+    return not is_negated_request(text) and any(pattern.search(text) for pattern in EXPLICIT_REQUEST_PATTERNS)
+
+
+def is_question(message: str) -> bool:
+    return (message or "").rstrip().endswith("?")
+
+
+def classify(user_messages, current_message: str = ""):
+    """Return True/False for clear cases, or None when the LLM should decide.
+
+    user_messages are the user's turns since the last plan was shared,
+    including current_message. A question never counts as a clear YES:
+    the user is still gathering information.
+    """
+    if is_negated_request(current_message):
+        return False
+    if is_explicit_request(current_message):
+        return True
+
+    scores = score_stages(user_messages)
+    covered = sum(1 for hits in scores.values() if hits >= STAGE_THRESHOLD)
+
+    if len(user_messages) < MIN_USER_TURNS or covered <= 1:
+        return False
+    if (covered == len(STAGE_KEYWORDS) and len(user_messages) >= CONFIDENT_USER_TURNS
+            and not is_question(current_message)):
+        return True
+    return None
@@ -0,0 +1,65 @@
+"""Rolling project brief for long planning conversations.
+
+Every few turns the older part of the conversation and the accumulated
+project info are folded into a short structured brief (basics, features,
+technical details). Prompts then carry the brief plus only the most recent
+turns, so their size stays bounded however long the session runs.
+"""
+import json
+import os
+
+import prompts
+
+# Summarize once this many turns have been added since the last summary
+SUMMARY_EVERY_TURNS = int(os.getenv('SUMMARY_EVERY_TURNS', '6'))
+# Turns kept verbatim in prompts once a brief exists
+RECENT_TURNS_AFTER_BRIEF = int(os.getenv('RECENT_TURNS_AFTER_BRIEF', '6'))
+
+BRIEF_SECTIONS = {
+    "basics": "Basics",
+    "features": "Features",
+    "technical": "Technical",
+}
+
+
+def empty_brief() -> dict:
+    return {section: "" for section in BRIEF_SECTIONS}
+
+
+def render(brief: dict) -> str:
+    """Brief as prompt text, skipping empty sections."""
+    return "\n".join(
+        f"- {label}: {brief[section]}" for section, label in BRIEF_SECTIONS.items() if brief.get(section)
+    )
+
+
+def as_project_info(brief: dict) -> str:
+    """Brief flattened into the single string the plan generator takes."""
+    return " ".join(
+        f"{label}: {brief[section]}" for section, label in BRIEF_SECTIONS.items() if brief.get(section)
+    )
+
+
+def build_prompt(brief: dict, turns_text: str, project_info: str) -> str:
+    """Per-request part of the prompts.PROJECT_BRIEF template."""
+    return prompts.PROJECT_BRIEF.render(
+        brief=render(brief) or "(empty)",
+        turns=turns_text or "(none)",
+        project_info=project_info or "(none)"
+    )
+
+
+def parse(raw_response: str, previous: dict) -> dict:
+    """Merge a model response into the previous brief; keep old sections the model left out."""
+    try:
+        data = json.loads(raw_response)
+    except (json.JSONDecodeError, TypeError):
+        return previous
+    if not isinstance(data, dict):
+        return previous
+    brief = dict(previous)
+    for section in BRIEF_SECTIONS:
+        value = data.get(section)
+        if isinstance(value, str) and value.strip():
+            brief[section] = value.strip()
+    return brief
@@ -0,0 +1,104 @@
+"""Merge LLM assignment recommendations back into the base scores.
+
+The model refers to members by username, and not always verbatim (casing,
+stray whitespace). Members it reviewed are indexed once by user_id and
+normalized username, so every model entry is matched in O(1) and the whole
+merge is O(n). Entries that match nobody, repeat a member or lack a usable
+score are reported in the diagnostics instead of being silently dropped.
+"""
+import re
+
+ANALYTICS_ONLY_REASONING = "Based on analytics data only"
+
+
+def normalize_username(username) -> str:
+    """Case- and whitespace-insensitive form of a username for matching."""
+    return re.sub(r"\s+", " ", str(username)).strip().casefold()
+
+
+def build_index(reviewed):
+    """user_id -> item and normalized username -> items (in team order)."""
+    by_id = {}
+    by_name = {}
+    for item in reviewed:
+        by_id[str(item["user_id"])] = item
+        by_name.setdefault(normalize_username(item["username"]), []).append(item)
+    return by_id, by_name
+
+
+def merge(base_scores, reviewed, llm_recommendations):
+    """Combine base scores with the model's adjustments.
+
+    `reviewed` is the subset of base_scores the model was shown; only those
+    can be matched. Returns (recommendations, diagnostics). Every member of
+    base_scores appears exactly once: with the model's adjusted score when a
+    valid entry matched it, with its base score otherwise. Members the model
+    reviewed rank first, each group by score.
+    """
+    by_id, by_name = build_index(reviewed)
+    matches = {}  # id(base item) -> llm entry
+    unknown, duplicates, invalid = [], [], []
+
+    for entry in llm_recommendations or []:
+        if not isinstance(entry, dict):
+            invalid.append(entry)
+            continue
+        item = by_id.get(str(entry.get("user_id")))
+        if item is None:
+            # Same-named members are matched in team order
+            candidates = by_name.get(normalize_username(entry.get("username", "")), [])
+            item = next((candidate for candidate in candidates if id(candidate) not in matches), None)
+            if item is None and candidates:
+                duplicates.append(entry.get("username"))
+                continue
+        if item is None:
+            unknown.append(entry.get("username"))
+        elif id(item) in matches:
+            duplicates.append(entry.get("username"))
+        elif isinstance(entry.get("adjusted_score"), bool) or not isinstance(entry.get("adjusted_score"), (int, float)):
+            invalid.append(entry.get("username"))
+        else:
+            matches[id(item)] = entry
+
+    recommendations = []
+    for item in base_scores:
+        entry = matches.get(id(item))
+        if entry is not None:
+            recommendations.append({
+                "user_id": item["user_id"],
+                "username": item["username"],
+                "score": entry["adjusted_score"],
+                "base_score": item["base_score"],
+                "confidence_level": entry.get("confidence_level"),
+                "reasoning": entry.get("reasoning") or ANALYTICS_ONLY_REASONING,
+                "development_opportunity": entry.get("development_opportunity"),
+                "metrics": item["metrics"],
+                "llm_reviewed": True
+            })
+        else:
+            # Fallback to base score if LLM didn't process (or never saw) this member
+            recommendations.append({
+                "user_id": item["user_id"],
+                "username": item["username"],
+                "score": item["base_score"],
+                "base_score": item["base_score"],
+                "reasoning": ANALYTICS_ONLY_REASONING,
+                "metrics": item["metrics"],
+                "llm_reviewed": False
+            })
+
+    # Sort by adjusted score, members the LLM reviewed first
+    recommendations.sort(key=lambda rec: (rec["llm_reviewed"], rec["score"]), reverse=True)
+
+    diagnostics = {
+        "matched": len(matches),
+        "unmatched_members": [item["username"] for item in reviewed if id(item) not in matches],
+        "unknown_entries": unknown,
+        "duplicate_entries": duplicates,
+        "invalid_entries": invalid,
+    }
+    return recommendations, diagnostics
+
+
+def has_issues(diagnostics: dict) -> bool:
+    return any(diagnostics[key] for key in ("unmatched_members", "unknown_entries", "duplicate_entries", "invalid_entries"))
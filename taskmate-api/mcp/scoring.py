@@ -0,0 +1,176 @@
+"""Vectorized base scoring for task assignment.
+
+Scores every (member, category) pair at once with NumPy and selects the
+best members with argpartition instead of sorting everyone. This keeps
+org-wide "who should take this" queries over hundreds of members cheap.
+"""
+import numpy as np
+
+CATEGORIES = ["frontend", "backend", "database", "testing", "general"]
+
+NEUTRAL_SCORE = 50
+DEFAULT_EXPERTISE = 0
+DEFAULT_SUCCESS_RATE = 50
+# Concurrent tasks assumed for members without historical capacity
+DEFAULT_CAPACITY = 3
+
+
+def build_arrays(member_metrics, categories):
+    """Columnar arrays from (workload, expertise_by_category, capacity) tuples.
+
+    Returns workload and capacity of shape (members,) and expertise and
+    success rate of shape (members, categories). Categories a member has
+    no data for get the same defaults as the scalar scorer.
+    """
+    member_metrics = list(member_metrics)
+    workload = np.zeros(len(member_metrics))
+    capacity = np.zeros(len(member_metrics))
+    expertise = np.full((len(member_metrics), len(categories)), float(DEFAULT_EXPERTISE))
+    success_rate = np.full((len(member_metrics), len(categories)), float(DEFAULT_SUCCESS_RATE))
+
+    for row, (member_workload, member_expertise, member_capacity) in enumerate(member_metrics):
+        workload[row] = member_workload
+        capacity[row] = member_capacity
+        for column, category in enumerate(categories):
+            category_data = member_expertise.get(category)
+            if category_data:
+                expertise[row, column] = category_data.get("expertise_score", DEFAULT_EXPERTISE)
+                success_rate[row, column] = category_data.get("success_rate_percentage", DEFAULT_SUCCESS_RATE)
+    return workload, capacity, expertise, success_rate
+
+
+def score_matrix(workload, capacity, expertise, success_rate):
+    """Base score for every member (rows) and category (columns), 0-100 with one decimal.
+
+    Implements the 5 core metrics:
+    1. Task completion time (via expertise score)
+    2. Task success rate
+    3. Current workload
+    4. Task category expertise
+    5. Historical capacity
+    """
+    workload = np.asarray(workload, dtype=float)[:, None]
+    capacity = np.asarray(capacity, dtype=float)[:, None]
+    expertise = np.asarray(expertise, dtype=float)
+    success_rate = np.asarray(success_rate, dtype=float)
+
+    # Metrics 1, 2 & 4: category expertise (0-35) and success rate (0-25)
+    expertise_bonus = (expertise / 100) * 35
+    success_bonus = (success_rate / 100) * 25
+
+    # Metrics 3 & 5: workload vs capacity, banded around the 60-80% sweet spot
+    has_capacity = capacity > 0
+    workload_ratio = workload / np.where(has_capacity, capacity, 1)
+    banded = np.select(
+        [workload_ratio <= 0.6, workload_ratio <= 0.8, workload_ratio <= 1.0],
+        [0, 5, -10],
+        default=-20
+    )
+    workload_adjustment = np.where(has_capacity, banded, np.where(workload > 2, -5, 0))
+
+    availability_bonus = np.where(workload == 0, 10, 0)
+    experience_penalty = np.where(expertise < 20, -10, 0)
+
+    # Summed in this order, matching the original scalar scorer float for float
+    final_score = (NEUTRAL_SCORE + expertise_bonus + success_bonus +
+                   workload_adjustment + availability_bonus + experience_penalty)
+    return round_one_decimal(np.clip(final_score, 0, 100))
+
+
+def round_one_decimal(values):
+    """Vectorized equivalent of Python's round(value, 1).
+
+    np.round scales by 10 first, which can tip values lying next to a .x5
+    boundary the other way; those few are rounded with Python's round.
+    """
+    scaled = values * 10
+    rounded = np.rint(scaled) / 10
+    near_half = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(float(value), 1) for value in values[near_half]]
+    return rounded
+
+
+def top_k(scores, k):
+    """Row indices of the k best scores in each column, best first.
+
+    Ties go to the lower row index, matching a stable sort of the members
+    in their original order. Returns an array of shape (min(k, rows), columns).
+    """
+    scores = np.asarray(scores)
+    rows = scores.shape[0]
+    k = min(k, rows)
+    if k == 0:
+        return np.empty((0,) + scores.shape[1:], dtype=int)
+
+    # Scores have one decimal, so this integer key is exact and breaks ties by row
+    row_index = np.arange(rows).reshape((rows,) + (1,) * (scores.ndim - 1))
+    keys = np.rint(scores * 10).astype(np.int64) * rows + (rows - 1 - row_index)
+    if k < rows:
+        candidates = np.argpartition(-keys, k - 1, axis=0)[:k]
+    else:
+        candidates = np.broadcast_to(row_index, scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(keys, candidates, axis=0), axis=0)
+    return np.take_along_axis(candidates, order, axis=0)
+
+
+def score_members(member_metrics, category):
+    """Base scores of each member for a single category, as Python floats."""
+    scores = score_matrix(*build_arrays(member_metrics, [category]))
+    return [float(score) for score in scores[:, 0]]
+
+
+def top_indices(scores, k):
+    """Positions of the k best scores in a flat list, best first (ties in list order)."""
+    if not len(scores):
+        return []
+    return [int(index) for index in top_k(np.asarray(scores, dtype=float), k)]
+
+
+def assign_tasks(workload, capacity, expertise, success_rate, task_columns, task_hours, alternatives=2):
+    """Assign a batch of tasks jointly, one member per task.
+
+    Tasks are placed largest first. Each goes to the best-scoring member
+    who still has room (workload below capacity), re-scored against the
+    workload already handed out in this batch, so one strong member does
+    not take everything. Ties go to the member with fewer assigned hours,
+    then to member order. When the whole team is full the task goes to the
+    best-scoring member anyway and is flagged over capacity.
+
+    `task_columns` picks each task's category column in expertise and
+    success_rate. Returns (assignments, assigned_hours): for every task, in
+    input order, a dict with the member row, score, over_capacity flag and
+    the next best rows as alternatives; and the hours given to each member.
+    """
+    workload = np.array(workload, dtype=float)
+    capacity = np.asarray(capacity, dtype=float)
+    expertise = np.asarray(expertise, dtype=float)
+    success_rate = np.asarray(success_rate, dtype=float)
+    task_hours = np.asarray(task_hours, dtype=float)
+
+    rows = np.arange(len(workload))
+    limit = np.where(capacity > 0, capacity, DEFAULT_CAPACITY)
+    assigned_hours = np.zeros(len(workload))
+    assignments = [None] * len(task_columns)
+    if not len(workload):
+        return assignments, assigned_hours
+
+    for task in sorted(range(len(task_columns)), key=lambda index: -task_hours[index]):
+        column = task_columns[task]
+        scores = score_matrix(workload, capacity, expertise[:, [column]], success_rate[:, [column]])[:, 0]
+        has_room = workload + 1 <= limit
+        over_capacity = not has_room.any()
+        eligible = rows if over_capacity else rows[has_room]
+
+        # Best score, then fewest hours already assigned, then member order
+        order = eligible[np.lexsort((eligible, assigned_hours[eligible], -scores[eligible]))]
+        row = int(order[0])
+        assignments[task] = {
+            "row": row,
+            "score": float(scores[row]),
+            "over_capacity": over_capacity,
+            "alternatives": [int(other) for other in order[1:alternatives + 1]],
+        }
+        workload[row] += 1
+        assigned_hours[row] += task_hours[task]
+    return assignments, assigned_hours
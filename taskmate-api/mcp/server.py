@@ -1,15 +1,72 @@
+import asyncio
 import json
+import os
 import uuid
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from dispatcher import ConnectionDispatcher
+import llm_service
+import prompts
+import session_store
 from agents.orchestrator import orchestrator
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def startup():
+    """Build the models once so the first requests don't pay for it."""
+    try:
+        llm_service.get_configured_model()
+        for template in prompts.TEMPLATES:
+            llm_service.get_configured_model(system_instruction=template.system)
+    except ValueError as e:
+        print(f"LLM not configured at startup: {e}")
+    app.state.session_sweeper = asyncio.create_task(_sweep_sessions())
+
+async def _sweep_sessions():
+    """Periodically drop sessions left idle by clients that never disconnected cleanly."""
+    while True:
+        await asyncio.sleep(session_store.SESSION_SWEEP_INTERVAL)
+        try:
+            evicted = orchestrator.sessions.evict_expired()
+            if evicted:
+                print(f"Evicted {evicted} idle sessions")
+        except Exception as e:
+            print(f"Session sweep failed: {e}")
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the session sweeper and the persistent analytics bridge workers."""
+    app.state.session_sweeper.cancel()
+    await orchestrator.analytics_agent.bridge.close()
+
+@app.get("/llm/cache-stats")
+async def llm_cache_stats():
+    """Response cache counters, to measure how many model calls were saved."""
+    return llm_service.cache_stats()
+
+@app.get("/llm/scheduler-stats")
+async def llm_scheduler_stats():
+    """Queue depth per priority class and rate-limit counters for model calls."""
+    return llm_service.scheduler_stats()
+
+@app.post("/llm/reload")
+async def llm_reload():
+    """Re-read .env now instead of waiting for the next modification-time check."""
+    llm_service.reload_models()
+    return {"env_file": llm_service.ENV_FILE or None, "model": os.getenv('LLM_MODEL', llm_service.DEFAULT_MODEL)}
+
+@app.get("/sessions/stats")
+async def session_stats():
+    """Live session count and evictions for the configured session store."""
+    return orchestrator.sessions.stats()
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """Handles incoming WebSocket connections and messages."""
     await websocket.accept()
     session_id = None
+    # Each message runs as its own task so slow requests don't hold up the rest
+    dispatcher = ConnectionDispatcher(websocket, orchestrator.handle_message)
     print("New client connected, waiting for session ID...")
 
     try:
@@ -21,24 +78,25 @@ async def websocket_endpoint(websocket: WebSocket):
                 if not session_id:
                     session_id = request.get("sessionId")
                     if not session_id:
-                        await websocket.send_json({"error": "Session ID not provided."})
+                        await dispatcher.websocket.send_json({"error": "Session ID not provided."})
                         continue
                     print(f"Client registered with session ID: {session_id}")
 
-                await orchestrator.handle_message(session_id, websocket, request)
+                await dispatcher.dispatch(session_id, request)
             except json.JSONDecodeError:
-                await websocket.send_json({"error": "Invalid JSON format."})
+                await dispatcher.websocket.send_json({"error": "Invalid JSON format."})
             except Exception as e:
                 error_message = f"An unexpected error occurred: {e}"
                 print(error_message)
-                await websocket.send_json({"error": error_message})
+                await dispatcher.websocket.send_json({"error": error_message})
 
     except WebSocketDisconnect:
+        await dispatcher.close()
         if session_id:
             print(f"Client {session_id} disconnected")
-            if session_id in orchestrator.sessions:
-                del orchestrator.sessions[session_id]
+            orchestrator.end_session(session_id)
     except Exception as e:
+        await dispatcher.close()
         if session_id:
             print(f"An error occurred in session {session_id}: {e}")
 
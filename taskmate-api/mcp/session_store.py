@@ -0,0 +1,150 @@
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict, deque
+
+SESSION_STORE_BACKEND = os.getenv('SESSION_STORE_BACKEND', 'memory')  # memory | sqlite
+SESSION_STORE_PATH = os.getenv('SESSION_STORE_PATH', os.path.join(os.path.dirname(__file__), 'sessions.sqlite3'))
+SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', '3600'))
+SESSION_MAX_SESSIONS = int(os.getenv('SESSION_MAX_SESSIONS', '1000'))
+SESSION_SWEEP_INTERVAL = float(os.getenv('SESSION_SWEEP_INTERVAL', '60'))
+
+
+def _to_json(value):
+    # Bounded buffers (e.g. conversation history) are stored as plain lists
+    if isinstance(value, deque):
+        return list(value)
+    return str(value)
+
+
+class MemorySessionStore:
+    """Process-local session store.
+
+    Sessions idle for longer than `idle_ttl` seconds are dropped, and once
+    `max_sessions` is reached the least recently used session is evicted.
+    """
+
+    # Visible to this process only, so a disconnected client's session can go
+    shared = False
+
+    def __init__(self, max_sessions: int = SESSION_MAX_SESSIONS, idle_ttl: float = SESSION_IDLE_TTL):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.evictions = 0
+        self._sessions = OrderedDict()  # session_id -> (last_access, state)
+
+    def get(self, session_id: str):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        last_access, state = entry
+        if time.monotonic() - last_access > self.idle_ttl:
+            del self._sessions[session_id]
+            self.evictions += 1
+            return None
+        self._sessions[session_id] = (time.monotonic(), state)
+        self._sessions.move_to_end(session_id)
+        return state
+
+    def save(self, session_id: str, state: dict):
+        self._sessions[session_id] = (time.monotonic(), state)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+    def evict_expired(self) -> int:
+        cutoff = time.monotonic() - self.idle_ttl
+        expired = [session_id for session_id, (last_access, _) in self._sessions.items() if last_access < cutoff]
+        for session_id in expired:
+            del self._sessions[session_id]
+        self.evictions += len(expired)
+        return len(expired)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "sessions": len(self._sessions), "evictions": self.evictions}
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+
+class SQLiteSessionStore:
+    """Session store on a shared SQLite file.
+
+    Lets several uvicorn workers serve the same session and keeps
+    conversations across restarts. State is stored as JSON, so it must
+    only hold JSON-serializable values.
+    """
+
+    # Other workers (and the next process after a restart) may serve the session
+    shared = True
+
+    def __init__(self, path: str = SESSION_STORE_PATH, max_sessions: int = SESSION_MAX_SESSIONS,
+                 idle_ttl: float = SESSION_IDLE_TTL):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.evictions = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._conn:
+            # WAL lets readers in other workers proceed while one worker writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY, state TEXT NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def get(self, session_id: str):
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT state FROM sessions WHERE session_id = ? AND accessed_at > ?",
+            (session_id, now - self.idle_ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._conn:
+            self._conn.execute("UPDATE sessions SET accessed_at = ? WHERE session_id = ?", (now, session_id))
+        return json.loads(row[0])
+
+    def save(self, session_id: str, state: dict):
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, state, accessed_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state, default=_to_json), now)
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id NOT IN"
+                " (SELECT session_id FROM sessions ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_sessions,)
+            )
+            self.evictions += cursor.rowcount
+
+    def delete(self, session_id: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def evict_expired(self) -> int:
+        with self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE accessed_at <= ?", (time.time() - self.idle_ttl,)
+            )
+        self.evictions += cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        size = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {"backend": "sqlite", "sessions": size, "evictions": self.evictions}
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+
+def create_session_store(backend: str = SESSION_STORE_BACKEND):
+    if backend == 'sqlite':
+        return SQLiteSessionStore()
+    return MemorySessionStore()
@@ -0,0 +1,166 @@
+import json
+import re
+
+_HEX4 = re.compile(r'[0-9a-fA-F]{4}')
+_REPLACEMENT = '\ufffd'
+
+
+def _hex4(text: str):
+    """Value of four hex digits, or None if `text` isn't exactly that."""
+    return int(text, 16) if _HEX4.fullmatch(text) else None
+
+
+class JsonStringFieldExtractor:
+    """Pull the value of one string field out of a JSON document as it streams in.
+
+    Feed raw chunks of model output; each call returns the newly decoded
+    part of the field's value (escapes resolved), so it can be forwarded to
+    the client before the document is complete.
+    """
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self, field: str):
+        self._start = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._buffer = ""
+        self._pos = None  # index just past the opening quote, once found
+        self.done = False
+        self.value = ""
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._buffer += chunk
+
+        if self._pos is None:
+            match = self._start.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        decoded = []
+        buffer, i = self._buffer, self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self.done = True
+                i += 1
+                break
+            if char != '\\':
+                decoded.append(char)
+                i += 1
+                continue
+            # Escape sequence: wait for the rest of it if it was split across chunks
+            if i + 1 >= len(buffer):
+                break
+            code = buffer[i + 1]
+            if code == 'u':
+                if i + 6 > len(buffer):
+                    break
+                codepoint = _hex4(buffer[i + 2:i + 6])
+                if codepoint is None:
+                    # Malformed escape: don't fail the reply, mark it and read on
+                    decoded.append(_REPLACEMENT)
+                    i += 2
+                    continue
+                if 0xD800 <= codepoint < 0xDC00:
+                    # High surrogate: combine with the \uXXXX low surrogate that follows
+                    follows = buffer[i + 6:i + 8]
+                    if follows == '\\u'[:len(follows)] and i + 12 > len(buffer):
+                        break
+                    low = _hex4(buffer[i + 8:i + 12]) if follows == '\\u' else None
+                    if low is not None and 0xDC00 <= low < 0xE000:
+                        codepoint = 0x10000 + ((codepoint - 0xD800) << 10) + (low - 0xDC00)
+                        i += 6
+                    else:
+                        codepoint = ord(_REPLACEMENT)
+                elif 0xDC00 <= codepoint < 0xE000:
+                    codepoint = ord(_REPLACEMENT)  # lone low surrogate
+                decoded.append(chr(codepoint))
+                i += 6
+            else:
+                decoded.append(self._ESCAPES.get(code, code))
+                i += 2
+
+        self._pos = i
+        text = "".join(decoded)
+        self.value += text
+        return text
+
+
+class JsonArrayItemExtractor:
+    """Emit the objects of selected arrays as soon as each one is complete.
+
+    Tracks just enough JSON structure (strings, nesting, keys) over the
+    streamed text to notice when an object inside one of the named arrays
+    closes, then decodes that object on its own. Text outside the JSON
+    document, such as ```json fences, is ignored.
+    """
+
+    def __init__(self, fields):
+        self.fields = set(fields)
+        self._buffer = ""
+        self._pos = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._after_colon = False
+        self._stack = []  # (bracket, key, item_start) per open container
+
+    def feed(self, chunk: str):
+        """Consume a chunk and return a list of (field, item) pairs completed by it."""
+        self._buffer += chunk
+        items = []
+        buffer = self._buffer
+
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1:i]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ':':
+                self._after_colon = True
+                continue
+            elif char in '{[':
+                key = self._last_string if self._after_colon else None
+                self._stack.append((char, key, i))
+            elif char in '}]' and self._stack:
+                _, _, item_start = self._stack.pop()
+                parent = self._stack[-1] if self._stack else None
+                if char == '}' and parent and parent[0] == '[' and parent[1] in self.fields:
+                    try:
+                        items.append((parent[1], json.loads(buffer[item_start:i + 1])))
+                    except json.JSONDecodeError:
+                        pass
+
+            if not char.isspace():
+                self._after_colon = False
+
+        self._pos = len(buffer)
+        return items
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+
+def loads_lenient(text: str):
+    """json.loads that tolerates a ```json fenced block around the document."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return json.loads(text)
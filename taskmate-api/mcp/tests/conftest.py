@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules in mcp/ import each other as top-level modules (the server runs from mcp/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,394 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("dotenv")
+pytest.importorskip("numpy")
+
+from agents import analytics_agent
+from agents.analytics_agent import AnalyticsAgent
+
+
+def make_agent(memberships=None, analytics=None):
+    """Agent whose bridge answers from the given fixtures (None = bridge unavailable)."""
+    agent = AnalyticsAgent()
+    calls = []
+
+    async def call_node_service(method, params):
+        calls.append((method, params))
+        if method == "getGroupsMembers" and memberships is not None:
+            return {"success": True, "memberships": memberships}
+        if method == "getTeamAnalyticsBatch" and analytics is not None:
+            wanted = set(params.get("user_ids") or analytics)
+            return {"success": True, "members": [
+                {"user_id": uid, **metrics} for uid, metrics in analytics.items() if uid in wanted
+            ]}
+        return None
+
+    agent._call_node_service = call_node_service
+    agent.calls = calls
+    return agent
+
+
+def test_org_members_are_deduplicated_across_groups():
+    agent = make_agent(memberships=[
+        {"group_id": "g1", "uid": "u1", "username": "Ana"},
+        {"group_id": "g1", "uid": "u2", "username": "Ben"},
+        {"group_id": "g2", "uid": "u2", "username": "Ben"},
+        {"group_id": "g2", "uid": "u3", "username": "Cal"},
+    ])
+    members = asyncio.run(agent._get_org_members(["g1", "g2"]))
+    assert members == [
+        {"uid": "u1", "username": "Ana", "group_ids": ["g1"]},
+        {"uid": "u2", "username": "Ben", "group_ids": ["g1", "g2"]},
+        {"uid": "u3", "username": "Cal", "group_ids": ["g2"]},
+    ]
+    assert agent.calls == [("getGroupsMembers", {"group_ids": ["g1", "g2"]})]
+
+
+def test_org_recommendations_send_only_the_shortlist_to_the_llm():
+    memberships = [
+        {"group_id": f"g{i % 40}", "uid": f"u{i % 300}", "username": f"user{i % 300}"} for i in range(600)
+    ]
+    analytics = {
+        f"u{i}": {
+            "current_workload": i % 5,
+            "expertise_by_category": {"backend": {"expertise_score": i % 97, "success_rate_percentage": 80}},
+            "historical_capacity": 5,
+        }
+        for i in range(300)
+    }
+    agent = make_agent(memberships, analytics)
+    seen = []
+
+    async def enhance(base_scores, task_description, task_category, context):
+        seen.append(base_scores)
+        raise RuntimeError("LLM unavailable")
+
+    agent._enhance_with_llm = enhance
+    response = asyncio.run(agent.handle("get_org_assignment_recommendations", {
+        "all_groups": True, "task_category": "backend", "shortlist_size": 5
+    }))
+
+    assert response["success"]
+    assert response["candidates_considered"] == 300
+    assert response["groups_considered"] == 40
+    assert len(seen[0]) == 5
+    shortlisted = [item["base_score"] for item in seen[0]]
+    assert shortlisted == sorted(shortlisted, reverse=True)
+    assert [rec["username"] for rec in response["recommendations"]] == [item["username"] for item in seen[0][:3]]
+
+
+def score_entry(username, base_score, expertise_score, workload=1, capacity=5):
+    return {
+        "user_id": username,
+        "username": username,
+        "base_score": base_score,
+        "metrics": {
+            "workload": workload,
+            "expertise": {"expertise_score": expertise_score, "success_rate_percentage": 70},
+            "capacity": capacity,
+        },
+    }
+
+
+def test_shortlist_adds_best_development_candidate():
+    base_scores = [
+        score_entry("a", 90, 80), score_entry("b", 85, 75), score_entry("c", 70, 60),
+        score_entry("d", 60, 30, workload=5), score_entry("e", 55, 20), score_entry("f", 40, 10),
+    ]
+    shortlist = AnalyticsAgent()._shortlist_for_llm(base_scores, size=2)
+    assert [(kind, item["username"]) for kind, item in shortlist] == [
+        ("top_score", "a"), ("top_score", "b"), ("development", "e")
+    ]
+    assert len(AnalyticsAgent()._shortlist_for_llm(base_scores, size=2, include_development=False)) == 2
+
+
+def test_pruned_members_keep_base_scores_and_rank_after_reviewed(monkeypatch):
+    import llm_service
+
+    prompts_seen = []
+
+    async def generate(prompt, **kwargs):
+        prompts_seen.append(prompt)
+        return '{"recommendations": [{"username": "a", "adjusted_score": 60, "confidence_level": "high", "reasoning": "ok"}]}'
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    base_scores = [score_entry(f"m{i}", 50 + i % 40, 70) for i in range(200)] + [score_entry("a", 99, 90)]
+    recommendations, _, diagnostics = asyncio.run(AnalyticsAgent()._enhance_with_llm(
+        base_scores, "build api", "backend", {"llm_shortlist_size": 3}
+    ))
+
+    assert prompts_seen[0].count('"username"') == 3
+    assert len(recommendations) == len(base_scores)
+    assert recommendations[0]["username"] == "a" and recommendations[0]["score"] == 60
+    pruned = {rec["username"]: rec for rec in recommendations if not rec["llm_reviewed"]}
+    assert all(rec["score"] == rec["base_score"] for rec in pruned.values())
+    assert diagnostics["matched"] == 1
+    assert len(diagnostics["unmatched_members"]) == 2
+
+
+def bulk_agent(llm_answer):
+    analytics = {
+        "u1": {"current_workload": 0, "historical_capacity": 2,
+               "expertise_by_category": {"backend": {"expertise_score": 95, "success_rate_percentage": 95}}},
+        "u2": {"current_workload": 1, "historical_capacity": 4,
+               "expertise_by_category": {"frontend": {"expertise_score": 85, "success_rate_percentage": 90}}},
+        "u3": {"current_workload": 0, "historical_capacity": 3,
+               "expertise_by_category": {"backend": {"expertise_score": 50, "success_rate_percentage": 70}}},
+    }
+    agent = make_agent(analytics=analytics)
+
+    async def team_members(group_id):
+        return [{"uid": "u1", "username": "Ana"}, {"uid": "u2", "username": "Ben"}, {"uid": "u3", "username": "Cal"}]
+
+    agent._get_team_members = team_members
+    return agent
+
+
+def test_bulk_assignment_uses_one_fetch_and_one_llm_call(monkeypatch):
+    import llm_service
+
+    prompts_seen = []
+
+    async def generate(prompt, **kwargs):
+        prompts_seen.append(prompt)
+        return ('{"assignments": [{"task_index": 4, "username": "ben"},'
+                ' {"task_index": 0, "username": "Ghost"}, {"task_index": 3, "username": "ANA"}],'
+                ' "summary": "Backend split between Ana and Cal."}')
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    agent = bulk_agent(None)
+    tasks = [
+        {"title": "Auth API", "task_category": "backend", "estimated_hours": 8},
+        {"title": "Login screen", "task_category": "frontend", "estimated_hours": 5},
+        {"title": "DB schema", "task_category": "backend", "estimated_hours": 6},
+        {"title": "Setup docs", "category": "general", "hours": 1},
+        {"title": "Deploy", "task_category": "backend", "estimated_hours": 3},
+    ]
+    response = asyncio.run(agent.handle("bulk_assignment_recommendations", {"group_id": "g1", "tasks": tasks}))
+
+    assert response["success"]
+    assert len(prompts_seen) == 1
+    assert [method for method, _ in agent.calls] == ["getTeamAnalyticsBatch"]
+    # Ana has room for two tasks, so the third backend task goes to Cal
+    owners = [entry["username"] for entry in response["assignments"]]
+    assert owners == ["Ana", "Ben", "Ana", "Cal", "Ben"]
+    moved = response["assignments"][4]
+    assert moved["source"] == "llm"
+    # Re-scored for Ben (no backend expertise, 2 of 4 tasks), not Cal's draft score
+    assert moved["score"] == 52.5
+    assert moved["alternatives"] == ["Cal"]
+    assert moved["reasoning"].startswith("Learning opportunity in backend")
+    load = {item["username"]: item for item in response["member_load"]}
+    assert all(item["current_workload"] + item["assigned_tasks"] <= item["capacity"] for item in load.values())
+    assert response["llm_diagnostics"] == {
+        "changes_applied": 1,
+        "unknown_entries": ["Ghost"],
+        "rejected_over_capacity": ["Ana"],
+        "invalid_entries": [],
+    }
+    assert response["summary"] == "Backend split between Ana and Cal."
+
+
+def test_bulk_assignment_sends_draft_first_and_survives_llm_failure(monkeypatch):
+    import llm_service
+
+    async def generate(prompt, **kwargs):
+        raise RuntimeError("quota")
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    agent = bulk_agent(None)
+    phases = []
+
+    async def on_progress(partial):
+        phases.append(partial["phase"])
+
+    response = asyncio.run(agent.handle("bulk_assignment_recommendations", {
+        "group_id": "g1", "tasks": [{"title": "Deploy", "task_category": "backend", "estimated_hours": 2}]
+    }, on_progress))
+
+    assert phases == ["initial"]
+    assert response["phase"] == "final"
+    assert response["assignments"][0]["username"] == "Ana"
+    assert "llm_diagnostics" not in response
+    assert asyncio.run(agent.handle("bulk_assignment_recommendations", {"group_id": "g1"}))["success"] is False
+
+
+def make_recording_agent(workloads):
+    """Agent whose bridge serves user/team analytics from `workloads` and accepts writes."""
+    agent = AnalyticsAgent()
+    calls = []
+
+    async def call_node_service(method, params):
+        calls.append(method)
+        if method == "getUserAnalyticsSummary":
+            return {"success": True, "analytics": {"current_workload": workloads[params["user_id"]]}}
+        if method == "getTeamAnalyticsSummary":
+            return {"success": True, "total_workload": sum(workloads.values())}
+        if method in ("recordTaskAssignment", "recordTaskCompletion"):
+            return {"success": True}
+        return None
+
+    agent._call_node_service = call_node_service
+    agent.calls = calls
+    return agent
+
+
+@pytest.mark.parametrize("completion", [
+    {"task_id": "t1", "user_id": "u1", "group_id": "g1"},
+    {"task_id": "t1"},  # ids unknown: everything cached is dropped
+])
+def test_recorded_completion_invalidates_cached_analytics(completion):
+    workloads = {"u1": 3, "u2": 1}
+    agent = make_recording_agent(workloads)
+
+    async def read():
+        user = await agent._get_real_analytics_data("u1")
+        team = await agent._call_group_service_cached("getTeamAnalyticsSummary", {"group_id": "g1"})
+        return user[0], team["total_workload"]
+
+    async def scenario():
+        assert await read() == (3, 4)
+        workloads["u1"] = 2
+        assert await read() == (3, 4)  # served from cache until a write is recorded
+        assert (await agent.handle("record_task_completion", completion))["method"] == "real"
+        return await read()
+
+    assert asyncio.run(scenario()) == (2, 3)
+    assert agent.calls.count("getUserAnalyticsSummary") == 2
+
+
+def test_recorded_assignment_invalidates_member_and_group_entries():
+    agent = make_recording_agent({"u1": 0, "u2": 0})
+    agent.user_analytics_cache.set("u1", (0, {}, 3))
+    agent.user_analytics_cache.set("u2", (0, {}, 3))
+    agent.team_members_cache.set("g1", [{"uid": "u1"}])
+    agent.group_analytics_cache.set(("g1", "getWorkloadDistribution", "{}"), {"success": True})
+    agent.group_analytics_cache.set(("g2", "getWorkloadDistribution", "{}"), {"success": True})
+
+    data = {"task_id": "t1", "user_id": "u1", "group_id": "g1"}
+    assert asyncio.run(agent.handle("record_task_assignment", data))["method"] == "real"
+    assert "u1" not in agent.user_analytics_cache
+    assert "u2" in agent.user_analytics_cache
+    assert "g1" not in agent.team_members_cache
+    assert ("g1", "getWorkloadDistribution", "{}") not in agent.group_analytics_cache
+    assert ("g2", "getWorkloadDistribution", "{}") in agent.group_analytics_cache
+
+
+def make_fan_out_agent(lookup):
+    """Agent without batch analytics whose per-member lookup is `lookup(uid)`."""
+    agent = make_agent()
+
+    async def get_real_analytics_data(user_id):
+        return await lookup(user_id)
+
+    agent._get_real_analytics_data = get_real_analytics_data
+    return agent
+
+
+def test_member_fan_out_stays_within_the_concurrency_bound(monkeypatch):
+    monkeypatch.setattr(analytics_agent, "MEMBER_LOOKUP_CONCURRENCY", 3)
+    running = {"now": 0, "max": 0}
+
+    async def lookup(uid):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return (1, {}, 5)
+
+    agent = make_fan_out_agent(lookup)
+    members = [{"uid": f"u{i}", "username": f"user{i}"} for i in range(10)]
+    results = asyncio.run(agent._fetch_member_analytics(members, "g1"))
+    assert results == [(1, {}, 5)] * 10
+    assert running["max"] == 3
+    assert agent.calls[0][0] == "getTeamAnalyticsBatch"
+
+
+def test_slow_member_falls_back_to_mock_data_alone(monkeypatch):
+    monkeypatch.setattr(analytics_agent, "MEMBER_LOOKUP_TIMEOUT", 0.05)
+
+    async def lookup(uid):
+        if uid == "dev_user2":
+            await asyncio.sleep(1)
+        return (0, {"backend": {"expertise_score": 99}}, 5)
+
+    agent = make_fan_out_agent(lookup)
+    members = [{"uid": f"dev_user{i}", "username": f"user{i}"} for i in (1, 2, 3)]
+    member_analytics = asyncio.run(agent._fetch_member_analytics(members, "test-group-456"))
+    assert member_analytics[1] is None
+    resolved = agent._resolve_member_analytics(members, member_analytics)
+    assert [expertise for _, _, expertise, _ in resolved] == [
+        {"backend": {"expertise_score": 99}},
+        agent._get_mock_analytics_data("dev_user2")[1],
+        {"backend": {"expertise_score": 99}},
+    ]
+    assert agent._summarize_data_source(member_analytics) == "mixed"
+
+
+def test_failing_member_lookup_does_not_fail_the_batch():
+    async def lookup(uid):
+        if uid == "u1":
+            raise RuntimeError("bridge exploded")
+        return (2, {}, 4)
+
+    agent = make_fan_out_agent(lookup)
+    members = [{"uid": f"u{i}", "username": f"user{i}"} for i in range(3)]
+    assert asyncio.run(agent._fetch_member_analytics(members)) == [(2, {}, 4), None, (2, {}, 4)]
+
+
+RECOMMEND = {"group_id": "test-group-456", "task_category": "frontend", "task_description": "Build the landing page"}
+
+
+def test_progressive_recommendations_send_initial_then_llm_result(monkeypatch):
+    import json
+
+    import llm_service
+
+    events = []
+
+    async def generate(prompt, **kwargs):
+        events.append("llm")
+        return json.dumps({
+            "recommendations": [{"username": "Sarah Chen", "adjusted_score": 97, "reasoning": "Frontend lead"}],
+            "suggested_plan": {"primary_assignee": "Sarah Chen", "plan_type": "solo"},
+        })
+
+    async def on_progress(partial):
+        events.append(partial)
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    final = asyncio.run(make_agent().handle("get_task_assignment_recommendations", RECOMMEND, on_progress))
+
+    initial = events[0]
+    assert events[1:] == ["llm"]
+    assert initial["phase"] == "initial"
+    assert initial["suggested_plan"]["pending_enhancement"] is True
+    assert not any(rec.get("llm_reviewed") for rec in initial["recommendations"])
+    assert final["phase"] == "final"
+    assert final["recommendations"][0]["username"] == "Sarah Chen"
+    assert final["recommendations"][0]["score"] == 97
+    assert final["suggested_plan"] == {"primary_assignee": "Sarah Chen", "plan_type": "solo"}
+
+
+def test_progressive_recommendations_still_finish_when_the_llm_fails(monkeypatch):
+    import llm_service
+
+    async def generate(prompt, **kwargs):
+        raise llm_service.LLMTimeoutError("no response within 8.0s")
+
+    phases = []
+
+    async def on_progress(partial):
+        phases.append(partial["phase"])
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    final = asyncio.run(make_agent().handle("get_task_assignment_recommendations", RECOMMEND, on_progress))
+    phases.append(final["phase"])
+
+    assert phases == ["initial", "final"]
+    assert final["success"] is True
+    assert final["suggested_plan"]["fallback_used"] is True
+    assert len(final["recommendations"]) == analytics_agent.RECOMMENDATIONS_RETURNED
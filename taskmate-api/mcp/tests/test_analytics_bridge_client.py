@@ -0,0 +1,213 @@
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+
+import analytics_bridge_client
+from analytics_bridge_client import BridgeError, BridgeWorker
+
+CRASH = [sys.executable, "-c", "import sys; sys.exit(1)"]
+# Answers one request, then exits
+ANSWER_ONCE = [sys.executable, "-c", (
+    "import json, sys\n"
+    "request = json.loads(sys.stdin.readline())\n"
+    "print(json.dumps({'id': request['id'], 'result': 'ok'}), flush=True)\n"
+)]
+
+
+class FakeStdin:
+    """Records written lines; drain() blocks until `writable` is set."""
+
+    def __init__(self):
+        self.lines = []
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    def write(self, data):
+        self.lines.append(json.loads(data))
+
+    async def drain(self):
+        await self.writable.wait()
+
+
+class FakeProcess:
+    def __init__(self, stdout, stdin=None):
+        self.stdout = stdout
+        self.stdin = stdin
+        self.returncode = None
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+        self.returncode = -9
+
+
+class FailingStdout:
+    async def readline(self):
+        raise RuntimeError("pipe broke")
+
+
+async def close_processes(processes):
+    for process in processes:
+        process.stdin.close()
+        await process.wait()
+    await asyncio.sleep(0)
+
+
+def start_reader(worker, process, pending):
+    worker.process = process
+    worker._reader_task = asyncio.ensure_future(worker._read_responses(process, pending))
+    return worker._reader_task
+
+
+def test_bad_lines_are_skipped_without_stopping_the_reader():
+    async def scenario():
+        stdout = asyncio.StreamReader(limit=64)
+        process = FakeProcess(stdout)
+        worker = BridgeWorker("bridge.js", "0")
+        loop = asyncio.get_running_loop()
+        first, second = loop.create_future(), loop.create_future()
+        reader = start_reader(worker, process, {1: first, 2: second})
+
+        stdout.feed_data(b'{"id": 1, "result": "' + b"x" * 200 + b'"}\n')
+        stdout.feed_data(b"[1, 2]\n\"text\"\nnull\nnot json\n\xff\xfe\n")
+        stdout.feed_data(b'{"id": [2], "result": 0}\n{"id": 2, "result": {"ok": true}}\n')
+        assert await asyncio.wait_for(second, 1) == {"ok": True}
+        assert not first.done()
+        assert worker.alive
+
+        stdout.feed_eof()
+        await reader
+        assert isinstance(first.exception(), BridgeError)
+        assert process.killed
+        assert not worker.alive
+
+    asyncio.run(scenario())
+
+
+def test_dead_reader_kills_the_process_and_fails_pending_calls():
+    async def scenario():
+        process = FakeProcess(FailingStdout())
+        worker = BridgeWorker("bridge.js", "0")
+        future = asyncio.get_running_loop().create_future()
+        reader = start_reader(worker, process, {1: future})
+        await asyncio.gather(reader, return_exceptions=True)
+
+        assert process.killed
+        assert isinstance(future.exception(), BridgeError)
+        # ensure_started must not mistake the worker for a healthy one
+        assert not worker.alive
+
+    asyncio.run(scenario())
+
+
+def test_crashing_worker_is_not_respawned_while_cooling_down(monkeypatch):
+    monkeypatch.setattr(analytics_bridge_client, "BRIDGE_RESTART_BACKOFF", 0.2)
+
+    async def scenario():
+        worker = BridgeWorker("bridge.js", "0")
+        worker.command = CRASH
+        spawned = []
+        for _ in range(5):
+            with pytest.raises(BridgeError):
+                await worker.call("ping", {}, timeout=5)
+            if worker.process not in spawned:
+                spawned.append(worker.process)
+        assert len(spawned) == 1
+        assert worker.failed_starts == 1
+
+        await asyncio.sleep(0.25)
+        with pytest.raises(BridgeError):
+            await worker.call("ping", {}, timeout=5)
+        spawned.append(worker.process)
+        assert spawned[1] is not spawned[0]
+        assert worker.failed_starts == 2
+        # The cooldown doubles after another failed start
+        assert worker._retry_at - time.monotonic() > 0.2
+        await close_processes(spawned)
+
+    asyncio.run(scenario())
+
+
+def test_worker_that_answered_restarts_without_cooldown(monkeypatch):
+    monkeypatch.setattr(analytics_bridge_client, "BRIDGE_RESTART_BACKOFF", 60)
+
+    async def scenario():
+        worker = BridgeWorker("bridge.js", "0")
+        worker.command = ANSWER_ONCE
+        assert await worker.call("ping", {}, timeout=5) == "ok"
+        await worker._reader_task
+        assert worker.failed_starts == 0
+        first = worker.process
+        assert await worker.call("ping", {}, timeout=5) == "ok"
+        assert worker.restarts == 1
+        await close_processes([first, worker.process])
+
+    asyncio.run(scenario())
+
+
+def running_worker(max_in_flight=32):
+    """Worker attached to a fake live process: (worker, stdin, stdout)."""
+    stdin, stdout = FakeStdin(), asyncio.StreamReader()
+    worker = BridgeWorker("bridge.js", "0", max_in_flight=max_in_flight)
+    start_reader(worker, FakeProcess(stdout, stdin), worker._pending)
+    return worker, stdin, stdout
+
+
+def answer(stdout, request_id, result="ok"):
+    stdout.feed_data((json.dumps({"id": request_id, "result": result}) + "\n").encode())
+
+
+def test_timed_out_call_sends_cancel_and_forgets_its_request():
+    async def scenario():
+        worker, stdin, _ = running_worker()
+        with pytest.raises(asyncio.TimeoutError):
+            await worker.call("getTeamAnalyticsSummary", {"group_id": "g1"}, timeout=0.05)
+        assert stdin.lines == [
+            {"id": 1, "method": "getTeamAnalyticsSummary", "params": {"group_id": "g1"}},
+            {"cancel": 1},
+        ]
+        assert worker._pending == {}
+        assert worker.load == 0
+
+    asyncio.run(scenario())
+
+
+def test_calls_beyond_the_slot_limit_wait_their_turn():
+    async def scenario():
+        worker, stdin, stdout = running_worker(max_in_flight=2)
+        calls = [asyncio.create_task(worker.call("ping", {"n": n}, timeout=5)) for n in range(4)]
+        await asyncio.sleep(0.01)
+        assert [line["params"]["n"] for line in stdin.lines] == [0, 1]
+        assert worker.load == 4  # two in flight, two queued
+
+        answer(stdout, 1)
+        await asyncio.sleep(0.01)
+        assert calls[0].done()
+        assert [line["params"]["n"] for line in stdin.lines] == [0, 1, 2]
+
+        for request_id in (2, 3, 4):
+            answer(stdout, request_id)
+            await asyncio.sleep(0.01)
+        assert await asyncio.gather(*calls) == ["ok"] * 4
+        assert worker.load == 0
+
+    asyncio.run(scenario())
+
+
+def test_call_waits_while_the_bridge_is_not_reading_stdin():
+    async def scenario():
+        worker, stdin, stdout = running_worker()
+        stdin.writable.clear()
+        call = asyncio.create_task(worker.call("ping", {}, timeout=5))
+        await asyncio.sleep(0.01)
+        answer(stdout, 1)
+        await asyncio.sleep(0.01)
+        assert not call.done()
+
+        stdin.writable.set()
+        assert await call == "ok"
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+from conversation_history import (
+    build_context, estimate_tokens, make_turn, new_history, summarize_plan, user_messages
+)
+
+
+def test_history_is_bounded():
+    history = new_history(maxlen=3)
+    for i in range(5):
+        history.append(make_turn("user", f"message {i}"))
+    assert [turn["content"] for turn in history] == ["message 2", "message 3", "message 4"]
+
+
+def test_legacy_string_entries_are_upgraded():
+    history = new_history(["User: hi", "Assistant: hello: there"])
+    assert user_messages(history) == ["hi"]
+    assert history[1] == make_turn("assistant", "hello: there")
+
+
+def test_plan_turns_render_as_summary():
+    plan = {"recommendations": {"project_name": "Todo", "milestones": [{"name": "MVP"}], "tasks": [{}, {}]}}
+    history = new_history([
+        make_turn("user", "make the plan"),
+        make_turn("assistant", "x" * 20000, kind="plan", summary=summarize_plan(plan)),
+    ])
+    context = build_context(history, token_budget=500)
+    assert "x" * 100 not in context
+    assert "'Todo' with 1 milestones and 2 tasks: MVP" in context
+    assert context.startswith("User: make the plan")
+
+
+def test_context_keeps_newest_turns_within_budget():
+    history = new_history([make_turn("user", f"turn {i} " + "word " * 50) for i in range(30)])
+    context = build_context(history, token_budget=300)
+    assert estimate_tokens(context) <= 300
+    assert "turn 29" in context
+    assert "turn 0 " not in context
+
+
+def test_long_turn_is_truncated():
+    history = new_history([make_turn("user", "a" * 10000)])
+    context = build_context(history, token_budget=1000)
+    assert context.endswith("[...]")
+    assert estimate_tokens(context) <= 1000
@@ -0,0 +1,154 @@
+import asyncio
+
+from dispatcher import ConnectionDispatcher
+
+POLL = {"type": "analytics", "action": "get_team_analytics"}
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+def test_slow_request_does_not_block_later_ones():
+    async def scenario():
+        websocket = FakeWebSocket()
+        release = asyncio.Event()
+
+        async def handler(session_id, ws, request):
+            if request["requestId"] == "slow":
+                await release.wait()
+            await ws.send_json({"requestId": request["requestId"]})
+
+        dispatcher = ConnectionDispatcher(websocket, handler, max_in_flight=4)
+        await dispatcher.dispatch("s1", {**POLL, "requestId": "slow"})
+        await dispatcher.dispatch("s1", {**POLL, "requestId": "fast"})
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        first = [message["requestId"] for message in websocket.sent]
+        release.set()
+        await asyncio.sleep(0.01)
+        return first, [message["requestId"] for message in websocket.sent], dispatcher.in_flight
+
+    first, final, in_flight = asyncio.run(scenario())
+    assert first == ["fast"]
+    assert final == ["fast", "slow"]
+    assert in_flight == 0
+
+
+def test_requests_over_cap_are_rejected_and_errors_are_reported():
+    async def scenario():
+        websocket = FakeWebSocket()
+        release = asyncio.Event()
+
+        async def handler(session_id, ws, request):
+            await release.wait()
+            raise RuntimeError("boom")
+
+        dispatcher = ConnectionDispatcher(websocket, handler, max_in_flight=1)
+        await dispatcher.dispatch("s1", {**POLL, "requestId": 1})
+        await dispatcher.dispatch("s1", {**POLL, "requestId": 2})
+        release.set()
+        await asyncio.sleep(0.01)
+        return websocket.sent
+
+    sent = asyncio.run(scenario())
+    assert sent[0]["requestId"] == 2 and "Too many requests" in sent[0]["error"]
+    assert sent[1] == {"error": "An unexpected error occurred: boom", "requestId": 1}
+
+
+def test_close_cancels_in_flight_requests():
+    async def scenario():
+        cancelled = []
+
+        async def handler(session_id, ws, request):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(request["requestId"])
+                raise
+
+        dispatcher = ConnectionDispatcher(FakeWebSocket(), handler)
+        await dispatcher.dispatch("s1", {**POLL, "requestId": "a"})
+        await asyncio.sleep(0)
+        await dispatcher.close()
+        return cancelled, dispatcher.in_flight
+
+    assert asyncio.run(scenario()) == (["a"], 0)
+
+
+def test_cancel_message_cancels_matching_request():
+    async def scenario():
+        websocket = FakeWebSocket()
+        cancelled = []
+
+        async def handler(session_id, ws, request):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(request["requestId"])
+                raise
+
+        dispatcher = ConnectionDispatcher(websocket, handler)
+        await dispatcher.dispatch("s1", {**POLL, "requestId": "a"})
+        await dispatcher.dispatch("s1", {**POLL, "requestId": "b"})
+        await asyncio.sleep(0)
+        await dispatcher.dispatch("s1", {"type": "cancel", "requestId": "a"})
+        await asyncio.sleep(0.01)
+        in_flight = dispatcher.in_flight
+        await dispatcher.close()
+        return websocket.sent, cancelled, in_flight
+
+    sent, cancelled, in_flight = asyncio.run(scenario())
+    assert sent == [{"event": "cancelled", "data": {"reason": "cancelled"}, "requestId": "a", "sessionId": "s1"}]
+    assert cancelled[0] == "a"
+    assert in_flight == 1
+
+
+def test_new_request_of_same_kind_supersedes_previous():
+    async def scenario():
+        websocket = FakeWebSocket()
+
+        async def handler(session_id, ws, request):
+            await asyncio.sleep(0.01)
+            await ws.send_json({"event": "response", "requestId": request["requestId"]})
+
+        dispatcher = ConnectionDispatcher(websocket, handler)
+        recommend = {"type": "analytics", "action": "get_task_assignment_recommendations"}
+        await dispatcher.dispatch("s1", {**recommend, "requestId": 1})
+        await dispatcher.dispatch("s1", {**recommend, "requestId": 2})
+        await dispatcher.dispatch("s1", {"params": {"message": "hi"}, "requestId": 3})
+        await dispatcher.dispatch("s1", {"params": {"message": "hi"}, "requestId": 4, "supersede": False})
+        await asyncio.sleep(0.05)
+        return [(message["event"], message["requestId"]) for message in websocket.sent]
+
+    sent = asyncio.run(scenario())
+    assert sent[0] == ("cancelled", 1)
+    assert sorted(sent[1:]) == [("response", 2), ("response", 3), ("response", 4)]
+
+
+def test_superseding_at_the_cap_replaces_the_previous_request():
+    async def scenario():
+        websocket = FakeWebSocket()
+
+        async def handler(session_id, ws, request):
+            await asyncio.sleep(0.01)
+            await ws.send_json({"event": "response", "requestId": request["requestId"]})
+
+        dispatcher = ConnectionDispatcher(websocket, handler, max_in_flight=1)
+        await dispatcher.dispatch("s1", {"params": {"message": "hi"}, "requestId": 1})
+        await dispatcher.dispatch("s1", {"params": {"message": "hi again"}, "requestId": 2})
+        in_flight = dispatcher.in_flight
+        await asyncio.sleep(0.05)
+        return websocket.sent, in_flight, dispatcher.in_flight
+
+    sent, in_flight, remaining = asyncio.run(scenario())
+    assert sent == [
+        {"event": "cancelled", "data": {"reason": "superseded"}, "requestId": 1, "sessionId": "s1"},
+        {"event": "response", "requestId": 2},
+    ]
+    assert in_flight == 1
+    assert remaining == 0
@@ -0,0 +1,120 @@
+import asyncio
+import types
+
+import pytest
+
+import llm_cache
+import ttl_cache
+from llm_cache import MemoryResponseCache, SQLiteResponseCache, make_cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ttl_cache, "time", types.SimpleNamespace(monotonic=clock))
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=clock))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(maxsize=3, ttl=60):
+        if request.param == "memory":
+            return MemoryResponseCache(maxsize=maxsize, ttl=ttl)
+        return SQLiteResponseCache(str(tmp_path / "cache.sqlite3"), maxsize=maxsize, ttl=ttl)
+    return make
+
+
+def test_entries_expire_after_ttl(make_cache, clock):
+    cache = make_cache(ttl=10)
+    cache.set("a", "answer")
+    clock.now += 9
+    assert cache.get("a") == "answer"
+    clock.now += 2
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entry_is_evicted_at_maxsize(make_cache, clock):
+    cache = make_cache(maxsize=2)
+    cache.set("a", "1")
+    clock.now += 1
+    cache.set("b", "2")
+    clock.now += 1
+    assert cache.get("a") == "1"  # "b" is now the least recently used
+    clock.now += 1
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["size"] == 2
+
+
+def test_stats_count_hits_and_misses(make_cache, clock):
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    assert cache.get("a") == "1"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 1)
+
+
+def test_sqlite_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteResponseCache(path).set("a", "answer")
+    assert SQLiteResponseCache(path).get("a") == "answer"
+
+
+def test_cache_key_separates_instructions_and_configs():
+    key = make_cache_key("model", "prompt", {"temperature": 0}, "You chat.")
+    assert key == make_cache_key("model", "prompt", {"temperature": 0}, "You chat.")
+    assert key != make_cache_key("model", "prompt", {"temperature": 0}, "You plan.")
+    assert key != make_cache_key("model", "prompt", {"temperature": 0})
+    assert key != make_cache_key("model", "prompt", {"temperature": 0.5}, "You chat.")
+    assert key != make_cache_key("model", "prompt", None, "You chat.")
+    assert key != make_cache_key("other", "prompt", {"temperature": 0}, "You chat.")
+    # Config objects are keyed by their set fields, like the equivalent dict
+    config = types.SimpleNamespace(temperature=0, top_p=None)
+    assert make_cache_key("model", "prompt", config, "You chat.") == key
+
+
+def test_generate_does_not_cache_error_responses(monkeypatch):
+    pytest.importorskip("google.generativeai")
+    pytest.importorskip("dotenv")
+    import llm_service
+    from llm_scheduler import LLMScheduler
+
+    class FakeModel:
+        model_name = "models/fake"
+
+        def __init__(self):
+            self.calls = 0
+
+        async def generate_content_async(self, prompt, generation_config=None):
+            self.calls += 1
+            if self.calls == 1:
+                raise ValueError("quota exceeded")
+            part = types.SimpleNamespace(text=f"answer {self.calls}")
+            return types.SimpleNamespace(parts=[part])
+
+    model = FakeModel()
+    monkeypatch.setattr(llm_service, "get_configured_model", lambda **kwargs: model)
+    monkeypatch.setattr(llm_service, "scheduler", LLMScheduler(requests_per_minute=60000))
+    monkeypatch.setattr(llm_service, "response_cache", MemoryResponseCache())
+
+    def generate():
+        return asyncio.run(llm_service.generate("prompt", cache=True, retries=0))
+
+    assert llm_service.is_error_response(generate())
+    assert llm_service.response_cache.stats()["size"] == 0
+    assert generate() == "answer 2"
+    assert generate() == "answer 2"
+    assert model.calls == 2
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("dotenv")
+
+import llm_service
+from llm_scheduler import LLMScheduler, LatencyTracker
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+class FakeModel:
+    """Answers after the next scripted latency; an exception in the script is raised instead."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        step = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if isinstance(step, Exception):
+            raise step
+        await asyncio.sleep(step)
+        return f"answer {self.calls}"
+
+
+@pytest.fixture(autouse=True)
+def fresh_scheduler(monkeypatch):
+    monkeypatch.setattr(llm_service, "scheduler", LLMScheduler(requests_per_minute=60000))
+    monkeypatch.setattr(llm_service, "latency", LatencyTracker(min_samples=5))
+    monkeypatch.setattr(llm_service, "hedge_stats", {"fired": 0, "won": 0, "timeouts": 0})
+
+
+def call(model, **kwargs):
+    params = dict(timeout=1, attempt_timeout=None, retries=0, hedge=False)
+    params.update(kwargs)
+    return llm_service._call_with_deadline(model, "prompt", None, 0, **params)
+
+
+def test_deadline_raises_timeout_error():
+    with pytest.raises(llm_service.LLMTimeoutError):
+        asyncio.run(call(FakeModel([1.0]), timeout=0.05))
+    assert llm_service.hedge_stats["timeouts"] == 1
+
+
+def test_slow_attempt_is_retried_within_deadline():
+    model = FakeModel([1.0, 0.01])
+    assert asyncio.run(call(model, attempt_timeout=0.05, retries=1)) == "answer 2"
+
+
+def test_transient_errors_are_retried_but_others_are_not():
+    assert asyncio.run(call(FakeModel([ServiceUnavailable("503"), 0]), retries=1)) == "answer 2"
+    with pytest.raises(ValueError):
+        asyncio.run(call(FakeModel([ValueError("bad prompt"), 0]), retries=1))
+
+
+def test_hedge_fires_after_p95_and_fast_duplicate_wins():
+    for _ in range(5):
+        llm_service.latency.record(0, 0.02)
+    model = FakeModel([0.5, 0.01])
+    assert asyncio.run(call(model, hedge=True)) == "answer 2"
+    assert llm_service.hedge_stats == {"fired": 1, "won": 1, "timeouts": 0}
+
+
+def test_no_hedge_without_latency_history():
+    model = FakeModel([0.05, 0.01])
+    assert asyncio.run(call(model, hedge=True)) == "answer 1"
+    assert model.calls == 1
@@ -0,0 +1,117 @@
+import asyncio
+
+import llm_scheduler
+from llm_scheduler import LLMScheduler, PRIORITY_ANALYTICS, PRIORITY_INTERACTIVE, PRIORITY_PLAN
+
+
+class ResourceExhausted(Exception):
+    code = 429
+
+
+class FakeModelServer:
+    """Stands in for the Gemini API: answers after a delay, 429s the first `fail_first` calls."""
+
+    def __init__(self, fail_first: int = 0, latency: float = 0.01):
+        self.fail_first = fail_first
+        self.latency = latency
+        self.calls = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    async def generate(self, name):
+        self.calls.append(name)
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            await asyncio.sleep(self.latency)
+            if len(self.calls) <= self.fail_first:
+                raise ResourceExhausted("429 Resource has been exhausted")
+            return f"response to {name}"
+        finally:
+            self.concurrent -= 1
+
+
+def test_concurrency_is_bounded():
+    async def scenario():
+        server = FakeModelServer()
+        scheduler = LLMScheduler(max_concurrency=2, requests_per_minute=6000, tokens_per_minute=10 ** 9)
+        results = await asyncio.gather(*[
+            scheduler.run(lambda i=i: server.generate(i)) for i in range(6)
+        ])
+        return server.max_concurrent, results, scheduler.stats()
+
+    max_concurrent, results, stats = asyncio.run(scenario())
+    assert max_concurrent == 2
+    assert results == [f"response to {i}" for i in range(6)]
+    assert stats["completed"] == 6 and stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+def test_queued_calls_are_admitted_by_priority():
+    async def scenario():
+        server = FakeModelServer()
+        scheduler = LLMScheduler(max_concurrency=1, requests_per_minute=6000, tokens_per_minute=10 ** 9)
+        first = asyncio.create_task(scheduler.run(lambda: server.generate("first")))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(scheduler.run(lambda: server.generate("analytics"), PRIORITY_ANALYTICS)),
+            asyncio.create_task(scheduler.run(lambda: server.generate("plan"), PRIORITY_PLAN)),
+            asyncio.create_task(scheduler.run(lambda: server.generate("chat"), PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        depth = scheduler.stats()["queued"]
+        await asyncio.gather(first, *queued)
+        return server.calls, depth
+
+    calls, depth = asyncio.run(scenario())
+    assert calls == ["first", "chat", "plan", "analytics"]
+    assert depth == {"interactive": 1, "plan": 1, "analytics": 1, "background": 0}
+
+
+def test_rate_limit_errors_are_retried_with_backoff():
+    async def scenario():
+        server = FakeModelServer(fail_first=2)
+        scheduler = LLMScheduler(requests_per_minute=600, tokens_per_minute=10 ** 9,
+                                 backoff_base=0.01, backoff_max=0.02)
+        result = await scheduler.run(lambda: server.generate("x"))
+        return result, scheduler.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert result == "response to x"
+    assert stats["rate_limited"] == 2 and stats["retries"] == 2
+    assert stats["requests_per_minute"] < 600
+
+
+def test_gives_up_after_max_retries_and_passes_other_errors_through():
+    async def scenario():
+        scheduler = LLMScheduler(max_retries=1, backoff_base=0.001, requests_per_minute=6000)
+        server = FakeModelServer(fail_first=5)
+        try:
+            await scheduler.run(lambda: server.generate("x"))
+        except ResourceExhausted:
+            pass
+
+        async def broken():
+            raise ValueError("bad request")
+        try:
+            await scheduler.run(broken)
+        except ValueError:
+            pass
+        return len(server.calls), scheduler.stats()
+
+    calls, stats = asyncio.run(scenario())
+    assert calls == 2
+    assert stats["retries"] == 1 and stats["in_flight"] == 0
+
+
+def test_request_bucket_spaces_out_calls():
+    async def scenario():
+        scheduler = LLMScheduler(requests_per_minute=1200, tokens_per_minute=10 ** 9)
+        scheduler.requests = llm_scheduler.TokenBucket(1200, capacity=1)
+        server = FakeModelServer(latency=0)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*[scheduler.run(lambda i=i: server.generate(i)) for i in range(3)])
+        return loop.time() - start
+
+    # 20 requests/second with room for one at a time: the 2nd and 3rd wait ~50ms each
+    assert asyncio.run(scenario()) >= 0.09
@@ -0,0 +1,77 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("dotenv")
+
+import llm_service
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch, tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("LLM_MODEL=model-a\n")
+    monkeypatch.setenv("LLM_MODEL", "model-a")
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(llm_service, "API_KEY", "test-key")
+    monkeypatch.setattr(llm_service, "_models", {})
+    monkeypatch.setattr(llm_service, "_configured_api_key", None)
+    monkeypatch.setattr(llm_service, "_active_model_name", None)
+    monkeypatch.setattr(llm_service, "ENV_FILE", str(env_file))
+    monkeypatch.setattr(llm_service, "_env_mtime", llm_service._env_file_mtime())
+    monkeypatch.setattr(llm_service, "ENV_CHECK_INTERVAL", 0)
+    return env_file
+
+
+def edit(env_file, text):
+    env_file.write_text(text)
+    # Make the change visible even on filesystems with coarse timestamps
+    stat = os.stat(env_file)
+    os.utime(env_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_models_are_reused_per_configuration():
+    model = llm_service.get_configured_model()
+    assert llm_service.get_configured_model() is model
+    assert model.model_name.endswith("model-a")
+    assert llm_service.get_configured_model(model_name_override="model-b") is not model
+
+
+def test_system_instruction_is_part_of_the_key():
+    chat = llm_service.get_configured_model(system_instruction="You chat.")
+    plan = llm_service.get_configured_model(system_instruction="You plan.")
+    assert chat is not plan
+    assert llm_service.get_configured_model(system_instruction="You chat.") is chat
+    assert llm_service.get_configured_model() not in (chat, plan)
+
+
+def test_editing_the_env_file_reloads_models(fresh_registry):
+    before = llm_service.get_configured_model(system_instruction="You chat.")
+    assert llm_service.get_configured_model(system_instruction="You chat.") is before
+
+    edit(fresh_registry, "LLM_MODEL=model-b\nGOOGLE_API_KEY=rotated-key\n")
+    after = llm_service.get_configured_model(system_instruction="You chat.")
+    assert after is not before
+    assert after.model_name.endswith("model-b")
+    assert llm_service.API_KEY == "rotated-key"
+    assert llm_service.get_configured_model(system_instruction="You chat.") is after
+
+
+def test_env_file_is_checked_at_most_once_per_interval(fresh_registry, monkeypatch):
+    model = llm_service.get_configured_model()
+    monkeypatch.setattr(llm_service, "ENV_CHECK_INTERVAL", 3600)
+    edit(fresh_registry, "LLM_MODEL=model-b\n")
+    assert llm_service.get_configured_model() is model
+
+
+def test_reload_endpoint_rebuilds_models(fresh_registry):
+    pytest.importorskip("fastapi")
+    import server
+
+    model = llm_service.get_configured_model()
+    fresh_registry.write_text("LLM_MODEL=model-c\n")
+    assert asyncio.run(server.llm_reload()) == {"env_file": str(fresh_registry), "model": "model-c"}
+    assert llm_service.get_configured_model().model_name.endswith("model-c")
+    assert llm_service.get_configured_model() is not model
@@ -0,0 +1,173 @@
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("fastapi")
+pytest.importorskip("dotenv")
+
+from agents.orchestrator import OrchestratorAgent
+
+
+def test_context_after_brief_keeps_every_unsummarized_turn():
+    agent = OrchestratorAgent()
+    for i in range(12):
+        agent.add_to_conversation("s1", f"msg{i}", is_user=i % 2 == 0)
+    state = agent.get_session_state("s1")
+    # As _summarize_session leaves it: turns up to the recent window folded in
+    state["project_brief"] = {"basics": "recipe app", "features": "", "technical": ""}
+    state["summarized_turns"] = 6
+    for i in range(12, 17):
+        agent.add_to_conversation("s1", f"msg{i}", is_user=i % 2 == 0)
+
+    context = agent.get_conversation_context("s1")
+    assert "recipe app" in context
+    turns = [line.split(": ", 1)[1] for line in context.splitlines() if line.startswith(("User: ", "Assistant: "))]
+    assert turns == [f"msg{i}" for i in range(6, 17)]
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+def test_plan_timeout_falls_back_to_trouble_reply(monkeypatch):
+    import asyncio
+
+    import llm_service
+    from agents import orchestrator as orchestrator_module
+
+    async def generate(prompt, **kwargs):
+        if kwargs.get("system_instruction") == orchestrator_module.prompts.CHAT_TURN.system:
+            return '{"reply": "Here it comes", "ready_for_plan": true}'
+        raise llm_service.LLMTimeoutError("no response within 180.0s")
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    agent = OrchestratorAgent()
+    websocket = FakeWebSocket()
+    request = {"params": {"message": "Please create the plan now"}, "requestId": "r1"}
+    asyncio.run(agent.handle_message("s2", websocket, request))
+
+    assert websocket.sent[-1]["data"]["content"] == orchestrator_module.PLAN_FAILED_REPLY
+    history = agent.get_session_state("s2")["conversation_history"]
+    assert [turn["role"] for turn in history] == ["user", "assistant"]
+    assert not agent.get_session_state("s2")["waiting_for_confirmation"]
+
+
+def test_chat_timeout_sends_a_reply(monkeypatch):
+    import asyncio
+
+    import llm_service
+    from agents import orchestrator as orchestrator_module
+
+    async def generate(prompt, **kwargs):
+        raise llm_service.LLMTimeoutError("no response within 60.0s")
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    websocket = FakeWebSocket()
+    asyncio.run(OrchestratorAgent().handle_message("s3", websocket, {"params": {"message": "hi"}}))
+    assert websocket.sent[-1]["data"]["content"] == orchestrator_module.CHAT_TIMEOUT_REPLY
+
+
+def test_disconnect_keeps_sessions_in_shared_store(tmp_path):
+    import session_store
+
+    agent = OrchestratorAgent()
+    agent.sessions = session_store.SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    agent.add_to_conversation("s4", "hello")
+    agent.sessions.save("s4", agent.get_session_state("s4"))
+    agent.end_session("s4")
+    assert "s4" in agent.sessions
+
+    agent.sessions = session_store.MemorySessionStore()
+    agent.get_session_state("s5")
+    agent.end_session("s5")
+    assert "s5" not in agent.sessions
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_failed_generation_is_not_shown_or_escalated(monkeypatch, stream):
+    import asyncio
+
+    import llm_service
+    from agents import orchestrator as orchestrator_module
+
+    calls = []
+
+    async def generate(prompt, **kwargs):
+        calls.append(prompt)
+        return f"{llm_service.GENERATION_ERROR_PREFIX} 429 Resource has been exhausted"
+
+    async def generate_stream(prompt, **kwargs):
+        calls.append(prompt)
+        yield '{"reply": "Hel'
+        yield f"{llm_service.STREAM_ERROR_PREFIX} 429 Resource has been exhausted"
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    monkeypatch.setattr(llm_service, "generate_stream", generate_stream)
+    websocket = FakeWebSocket()
+    request = {"params": {"message": "I want a recipe app", "stream": stream}, "requestId": "r6"}
+    asyncio.run(OrchestratorAgent().handle_message("s6", websocket, request))
+
+    assert len(calls) == 1
+    assert websocket.sent[-1]["data"]["content"] == orchestrator_module.CHAT_ERROR_REPLY
+
+
+@pytest.mark.parametrize("llm_fails", [False, True])
+def test_progressive_analytics_request_sends_initial_then_update(monkeypatch, llm_fails):
+    import asyncio
+    import json
+
+    import llm_service
+
+    async def generate(prompt, **kwargs):
+        if llm_fails:
+            return f"{llm_service.GENERATION_ERROR_PREFIX} 429 Resource has been exhausted"
+        return json.dumps({"recommendations": [{"username": "Sarah Chen", "adjusted_score": 97}]})
+
+    async def call_node_service(method, params):
+        return None  # bridge unavailable: mock team and analytics
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    agent = OrchestratorAgent()
+    monkeypatch.setattr(agent.analytics_agent, "_call_node_service", call_node_service)
+    websocket = FakeWebSocket()
+    request = {
+        "type": "analytics", "action": "get_task_assignment_recommendations", "progressive": True,
+        "requestId": "r7", "data": {"group_id": "test-group-456", "task_category": "frontend"},
+    }
+    asyncio.run(agent.handle_message("s7", websocket, request))
+
+    assert [(frame["event"], frame["data"]["phase"]) for frame in websocket.sent] == [
+        ("analytics_response", "initial"), ("analytics_update", "final")
+    ]
+    assert all(frame["requestId"] == "r7" for frame in websocket.sent)
+    final = websocket.sent[-1]["data"]
+    assert final["success"] is True
+    assert final["suggested_plan"].get("fallback_used", False) is llm_fails
+
+
+def test_non_progressive_analytics_request_sends_one_response(monkeypatch):
+    import asyncio
+
+    import llm_service
+
+    async def generate(prompt, **kwargs):
+        raise llm_service.LLMTimeoutError("no response within 8.0s")
+
+    async def call_node_service(method, params):
+        return None
+
+    monkeypatch.setattr(llm_service, "generate", generate)
+    agent = OrchestratorAgent()
+    monkeypatch.setattr(agent.analytics_agent, "_call_node_service", call_node_service)
+    websocket = FakeWebSocket()
+    request = {
+        "type": "analytics", "action": "get_task_assignment_recommendations",
+        "requestId": "r8", "data": {"group_id": "test-group-456"},
+    }
+    asyncio.run(agent.handle_message("s8", websocket, request))
+
+    assert [frame["event"] for frame in websocket.sent] == ["analytics_response"]
+    assert "phase" not in websocket.sent[0]["data"]
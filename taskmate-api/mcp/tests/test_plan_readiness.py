@@ -0,0 +1,93 @@
+import pytest
+
+import plan_readiness
+
+# Labelled conversations: the user's turns so far (last one is the current
+# message) and the expected decision. None means "ask the LLM".
+LABELLED_CONVERSATIONS = [
+    # Too early: only a basic idea
+    (["I want to build an app"], False),
+    (["Hi there"], False),
+    (["Can you help me with a project?"], False),
+    (["I want to make a website for my bakery", "Mostly for local customers"], False),
+    (["I'd like to create a game", "It's for kids", "Something fun"], False),
+
+    # Basics and features but no technical details yet
+    ([
+        "I want to build an app for students to track homework",
+        "Students should be able to add assignments and see a calendar with notifications",
+    ], None),
+
+    # All three stages covered in enough turns
+    ([
+        "I want to build a web app for our team to share recipes with the community",
+        "Users can create an account, upload recipes, search by ingredient and leave reviews",
+        "I'd use React with a Node backend and a Postgres database, about 2 months timeline",
+    ], True),
+    ([
+        "We need a mobile app for our gym customers to book classes",
+        "Features: login, a schedule of classes, booking, payments and notifications",
+        "Flutter for iOS and Android, Firebase for the backend",
+        "Budget is small and the deadline is in 3 months",
+    ], True),
+
+    # Coverage everywhere but only two turns: let the model decide
+    ([
+        "I want to build a platform for clients to track orders",
+        "It needs login, a dashboard, tracking and reports, using React, Python and a SQL database",
+    ], None),
+
+    # Explicit requests always go ahead
+    (["I want a todo app", "Please create the plan now"], True),
+    (["Go ahead and generate a project plan"], True),
+    (["ok, give me the plan"], True),
+
+    # Negated requests never go ahead, however much has been covered
+    (["I want a todo app", "I don't want you to create a plan yet"], False),
+    ([
+        "I want to build a web app for our team to share recipes with the community",
+        "Users can create an account, upload recipes, search by ingredient and leave reviews",
+        "React and Postgres, but please don't make the plan yet",
+    ], False),
+    (["I want a todo app", "not yet, I have more features"], False),
+
+    # Questions keep gathering information: never a clear YES
+    ([
+        "I want to build a web app for our team to share recipes with the community",
+        "Users can create an account, upload recipes, search by ingredient and leave reviews",
+        "I'd use React with a Node backend and a Postgres database, about 2 months timeline",
+        "wait, what database would you suggest?",
+    ], None),
+]
+
+
+@pytest.mark.parametrize("user_messages, expected", LABELLED_CONVERSATIONS)
+def test_labelled_conversations(user_messages, expected):
+    assert plan_readiness.classify(user_messages, user_messages[-1]) is expected
+
+
+def test_turns_before_the_last_plan_do_not_count():
+    from conversation_history import make_turn, new_history, user_messages_since_plan
+
+    history = new_history([
+        make_turn("user", "I want to build a web app for our team to share recipes with the community"),
+        make_turn("user", "Users can create an account, upload recipes, search and leave reviews"),
+        make_turn("user", "React with a Node backend and a Postgres database, 2 months"),
+        make_turn("assistant", "{...}", kind="plan", summary="[Shared a project plan]"),
+        make_turn("user", "thanks! that looks great"),
+    ])
+    since_plan = user_messages_since_plan(history)
+    assert since_plan == ["thanks! that looks great"]
+    assert plan_readiness.classify(since_plan, since_plan[-1]) is False
+
+
+def test_score_stages_counts_distinct_keywords():
+    scores = plan_readiness.score_stages(["React React and a database", "login and search"])
+    assert scores["technical"] == 2
+    assert scores["features"] == 2
+
+
+def test_keywords_match_whole_words_only():
+    # "apple" must not count as "app", nor "reacting" as "react"
+    scores = plan_readiness.score_stages(["apple reacting"])
+    assert scores == {"basics": 0, "features": 0, "technical": 0}
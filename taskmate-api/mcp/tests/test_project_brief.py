@@ -0,0 +1,19 @@
+import project_brief
+
+
+def test_parse_merges_into_previous_brief():
+    previous = {"basics": "todo app for students", "features": "lists", "technical": ""}
+    brief = project_brief.parse('{"features": "lists, reminders", "technical": "  "}', previous)
+    assert brief == {"basics": "todo app for students", "features": "lists, reminders", "technical": ""}
+
+
+def test_parse_keeps_previous_on_bad_output():
+    previous = project_brief.empty_brief()
+    assert project_brief.parse("not json", previous) is previous
+    assert project_brief.parse("[1, 2]", previous) is previous
+
+
+def test_render_skips_empty_sections():
+    brief = {"basics": "todo app", "features": "", "technical": "React"}
+    assert project_brief.render(brief) == "- Basics: todo app\n- Technical: React"
+    assert project_brief.as_project_info(brief) == "Basics: todo app Technical: React"
@@ -0,0 +1,93 @@
+import random
+import time
+
+import recommendation_merge
+
+
+def make_team(size, seed=3):
+    rng = random.Random(seed)
+    return [
+        {
+            "user_id": f"uid-{i}",
+            "username": f"Member {i}",
+            "base_score": round(rng.uniform(0, 100), 1),
+            "metrics": {"workload": i % 5, "expertise": {}, "capacity": 5},
+        }
+        for i in range(size)
+    ]
+
+
+def llm_entry(username, score, **extra):
+    return {"username": username, "adjusted_score": score, "confidence_level": "high", "reasoning": "fit", **extra}
+
+
+def test_matches_despite_casing_and_whitespace():
+    team = make_team(3)
+    recommendations, diagnostics = recommendation_merge.merge(team, team, [
+        llm_entry("MEMBER 0", 90), llm_entry("  member   1 ", 80), llm_entry("member 2", 70)
+    ])
+    assert diagnostics["matched"] == 3
+    assert [rec["username"] for rec in recommendations] == ["Member 0", "Member 1", "Member 2"]
+    assert all(rec["llm_reviewed"] for rec in recommendations)
+
+
+def test_reports_unknown_duplicate_invalid_and_unmatched_entries():
+    team = make_team(4)
+    recommendations, diagnostics = recommendation_merge.merge(team, team[:3], [
+        llm_entry("Member 0", 90),
+        llm_entry("member 0", 10),
+        llm_entry("Ghost", 99),
+        llm_entry("Member 3", 99),  # real member, but the model was never shown them
+        {"username": "Member 1", "adjusted_score": "high"},
+        "not an object",
+    ])
+    assert diagnostics == {
+        "matched": 1,
+        "unmatched_members": ["Member 1", "Member 2"],
+        "unknown_entries": ["Ghost", "Member 3"],
+        "duplicate_entries": ["member 0"],
+        "invalid_entries": ["Member 1", "not an object"],
+    }
+    assert recommendations[0]["username"] == "Member 0" and recommendations[0]["score"] == 90
+    by_name = {rec["username"]: rec for rec in recommendations}
+    assert by_name["Member 3"]["score"] == team[3]["base_score"]
+    assert recommendation_merge.has_issues(diagnostics)
+
+
+def test_same_named_members_match_by_user_id_then_team_order():
+    team = make_team(3)
+    team[1]["username"] = team[2]["username"] = "Alex Kim"
+    recommendations, diagnostics = recommendation_merge.merge(team, team, [
+        llm_entry("Alex Kim", 60, user_id="uid-2"), llm_entry("alex kim", 50)
+    ])
+    scores = {rec["user_id"]: rec["score"] for rec in recommendations}
+    assert scores["uid-2"] == 60 and scores["uid-1"] == 50
+    assert diagnostics["unmatched_members"] == ["Member 0"]
+
+
+def test_large_team_merges_every_member_once_in_linear_time():
+    team = make_team(20000)
+    entries = [llm_entry(item["username"].upper(), item["base_score"] / 2) for item in reversed(team)]
+
+    started = time.perf_counter()
+    recommendations, diagnostics = recommendation_merge.merge(team, team, entries)
+    elapsed = time.perf_counter() - started
+
+    assert diagnostics["matched"] == len(team)
+    assert not recommendation_merge.has_issues(diagnostics)
+    assert sorted(rec["user_id"] for rec in recommendations) == sorted(item["user_id"] for item in team)
+    scores = [rec["score"] for rec in recommendations]
+    assert scores == sorted(scores, reverse=True)
+    # The old nested lookup took minutes at this size
+    assert elapsed < 2
+
+
+def test_pruned_members_keep_base_scores_behind_reviewed_ones():
+    team = make_team(5000)
+    reviewed = sorted(team, key=lambda item: -item["base_score"])[:5]
+    recommendations, diagnostics = recommendation_merge.merge(
+        team, reviewed, [llm_entry(item["username"], 1) for item in reviewed]
+    )
+    assert [rec["llm_reviewed"] for rec in recommendations[:5]] == [True] * 5
+    assert all(rec["score"] == rec["base_score"] for rec in recommendations[5:])
+    assert len(recommendations) == len(team)
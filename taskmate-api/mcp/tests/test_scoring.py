@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import scoring
+
+
+def reference_score(workload, expertise, capacity, category):
+    """Scalar base-score formula the vectorized scorer has to reproduce exactly."""
+    score = 50
+    category_data = expertise.get(category, {})
+    expertise_score = category_data.get("expertise_score", 0)
+    score += (expertise_score / 100) * 35
+    score += (category_data.get("success_rate_percentage", 50) / 100) * 25
+    if capacity > 0:
+        ratio = workload / capacity
+        score += 0 if ratio <= 0.6 else 5 if ratio <= 0.8 else -10 if ratio <= 1.0 else -20
+    elif workload > 2:
+        score -= 5
+    if workload == 0:
+        score += 10
+    if expertise_score < 20:
+        score -= 10
+    return round(max(0, min(100, score)), 1)
+
+
+def random_member(rng):
+    expertise = {
+        category: {
+            "expertise_score": rng.randint(0, 100),
+            "success_rate_percentage": rng.randint(0, 100),
+        }
+        for category in scoring.CATEGORIES if rng.random() < 0.7
+    }
+    return rng.randint(0, 12), expertise, rng.randint(0, 10)
+
+
+def test_score_members_matches_scalar_formula():
+    rng = random.Random(7)
+    members = [random_member(rng) for _ in range(2000)]
+    for category in scoring.CATEGORIES:
+        expected = [reference_score(w, e, c, category) for w, e, c in members]
+        assert scoring.score_members(members, category) == expected
+
+
+def test_workload_bands_and_missing_category():
+    expertise = {"backend": {"expertise_score": 60, "success_rate_percentage": 80}}
+    members = [(0, expertise, 5), (4, expertise, 5), (5, expertise, 5), (7, expertise, 5), (3, expertise, 0)]
+    assert scoring.score_members(members, "backend") == [100.0, 96.0, 81.0, 71.0, 86.0]
+    # No data for the category: default expertise (penalized) and 50% success rate
+    assert scoring.score_members([(0, expertise, 5)], "frontend") == [62.5]
+
+
+def test_top_k_breaks_ties_by_member_order():
+    scores = np.array([[70.0], [85.5], [70.0], [85.5], [10.0]])
+    assert scoring.top_k(scores, 3)[:, 0].tolist() == [1, 3, 0]
+    assert scoring.top_k(scores, 10)[:, 0].tolist() == [1, 3, 0, 2, 4]
+    assert scoring.top_k(scores, 0).shape == (0, 1)
+
+
+def test_top_k_matches_stable_sort_per_category():
+    rng = random.Random(11)
+    members = [random_member(rng) for _ in range(500)]
+    scores = scoring.score_matrix(*scoring.build_arrays(members, scoring.CATEGORIES))
+    best = scoring.top_k(scores, 5)
+    for column, category in enumerate(scoring.CATEGORIES):
+        expected_scores = [reference_score(w, e, c, category) for w, e, c in members]
+        expected = sorted(range(len(members)), key=lambda i: -expected_scores[i])[:5]
+        assert best[:, column].tolist() == expected
+
+
+def test_top_indices_on_flat_lists():
+    assert scoring.top_indices([70.0, 85.5, 70.0, 85.5, 10.0], 3) == [1, 3, 0]
+    assert scoring.top_indices([], 3) == []
+
+
+def test_assign_tasks_respects_capacity_and_spreads_work():
+    categories = ["backend", "frontend"]
+    members = [
+        (0, {"backend": {"expertise_score": 95, "success_rate_percentage": 95}}, 2),
+        (0, {"backend": {"expertise_score": 60, "success_rate_percentage": 80},
+             "frontend": {"expertise_score": 70, "success_rate_percentage": 80}}, 3),
+        (2, {"frontend": {"expertise_score": 90, "success_rate_percentage": 90}}, 3),
+    ]
+    workload, capacity, expertise, success_rate = scoring.build_arrays(members, categories)
+    assignments, hours = scoring.assign_tasks(
+        workload, capacity, expertise, success_rate,
+        task_columns=[0, 0, 0, 1, 1], task_hours=[2, 8, 4, 3, 1]
+    )
+
+    rows = [assignment["row"] for assignment in assignments]
+    assert rows == [0, 0, 1, 2, 1]
+    assert not any(assignment["over_capacity"] for assignment in assignments)
+    assert hours.tolist() == [10.0, 5.0, 3.0]
+    # Largest backend task went first, to the strongest member with room
+    assert assignments[1]["alternatives"] == [1, 2]
+
+
+def test_assign_tasks_flags_over_capacity_when_team_is_full():
+    members = [(3, {}, 3), (5, {}, 4)]
+    workload, capacity, expertise, success_rate = scoring.build_arrays(members, ["general"])
+    assignments, _ = scoring.assign_tasks(workload, capacity, expertise, success_rate, [0], [1])
+    assert assignments[0]["over_capacity"]
+    assert assignments[0]["row"] == 0
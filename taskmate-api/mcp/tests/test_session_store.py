@@ -0,0 +1,43 @@
+import time
+
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+def test_memory_store_evicts_least_recently_used_over_cap():
+    store = MemorySessionStore(max_sessions=2, idle_ttl=60)
+    store.save("a", {"n": 1})
+    store.save("b", {"n": 2})
+    store.get("a")
+    store.save("c", {"n": 3})
+    assert store.get("b") is None
+    assert store.get("a") == {"n": 1}
+    assert store.stats()["evictions"] == 1
+
+
+def test_memory_store_expires_idle_sessions():
+    store = MemorySessionStore(max_sessions=10, idle_ttl=0.01)
+    store.save("a", {})
+    time.sleep(0.02)
+    assert store.evict_expired() == 1
+    assert store.get("a") is None
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    first = SQLiteSessionStore(path, max_sessions=10, idle_ttl=60)
+    second = SQLiteSessionStore(path, max_sessions=10, idle_ttl=60)
+    first.save("a", {"project_info": "todo app", "conversation_history": ["User: hi"]})
+    assert second.get("a") == {"project_info": "todo app", "conversation_history": ["User: hi"]}
+    second.delete("a")
+    assert first.get("a") is None
+
+
+def test_sqlite_store_caps_and_expires(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), max_sessions=2, idle_ttl=60)
+    for session_id in ("a", "b", "c"):
+        store.save(session_id, {})
+        time.sleep(0.001)
+    assert store.get("a") is None
+    assert store.stats()["sessions"] == 2
+    store.idle_ttl = 0
+    assert store.evict_expired() == 2
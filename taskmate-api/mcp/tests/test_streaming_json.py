@@ -0,0 +1,142 @@
+import json
+
+import pytest
+
+from streaming_json import JsonArrayItemExtractor, JsonStringFieldExtractor, loads_lenient
+
+REPLIES = [
+    "Plain reply with no escapes.",
+    'Quotes " and backslashes \\ and a slash /',
+    "Lines\nand\ttabs\r\nand \b \f controls",
+    "Accents: café, naïve, Ünïcödé",
+    "Emoji outside the BMP: 🚀 and 👩‍💻 done",
+    "",
+]
+
+
+def documents():
+    for reply in REPLIES:
+        for ensure_ascii in (True, False):
+            yield json.dumps({"ready": False, "reply": reply, "extra": "x"}, ensure_ascii=ensure_ascii)
+
+
+def feed_in_chunks(extractor, document, size):
+    streamed = []
+    for start in range(0, len(document), size):
+        streamed.append(extractor.feed(document[start:start + size]))
+    return "".join(streamed)
+
+
+@pytest.mark.parametrize("document", list(documents()))
+def test_every_chunk_size_matches_json_loads(document):
+    expected = json.loads(document)["reply"]
+    for size in range(1, len(document) + 1):
+        extractor = JsonStringFieldExtractor("reply")
+        streamed = feed_in_chunks(extractor, document, size)
+        assert streamed == expected, size
+        assert extractor.value == expected
+        assert extractor.done
+
+
+def test_nothing_is_emitted_before_the_field_appears():
+    extractor = JsonStringFieldExtractor("reply")
+    assert extractor.feed('{"ready": true, "rep') == ""
+    assert extractor.feed('ly": "hi') == "hi"
+    assert not extractor.done
+    assert extractor.feed('"}') == ""
+    assert extractor.done
+    assert extractor.feed('more') == ""
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (r'bad \uZZZZ escape', "bad �ZZZZ escape"),
+    (r'short \u12" tail', "short �12"),
+    (r'lone high \ud83d then text', "lone high � then text"),
+    (r'high then bad low \ud83dA', "high then bad low �A"),
+    (r'lone low \ude80 here', "lone low � here"),
+    (r'high at the end \ud83d', "high at the end �"),
+])
+def test_malformed_unicode_escapes_do_not_raise(raw, expected):
+    document = '{"reply": "' + raw + '"}'
+    for size in range(1, len(document) + 1):
+        extractor = JsonStringFieldExtractor("reply")
+        assert feed_in_chunks(extractor, document, size) == expected, size
+        assert extractor.done
+
+
+PLAN = {
+    "project_name": "Shop [v2] {beta}",
+    "milestones": [
+        {"title": "Setup", "description": "Repo, CI and the \\ path", "dependencies": []},
+        {"title": "Launch", "description": 'Say "done" }]', "dependencies": [[0], [0, 1]]},
+    ],
+    "tasks": [
+        {"title": "Schema", "description": 'Not a field: \\"tasks\\": [{\\"x\\": 1}]', "skills": ["sql", "[db]"]},
+        {"title": "API", "description": "Braces { and brackets [ left open", "milestone": 0, "meta": {"tags": ["a", {"b": []}]}},
+        {"title": "Ünïcode 🚀", "description": "tab\there", "estimate": {"hours": 3}},
+    ],
+}
+
+
+def plan_documents():
+    plain = json.dumps(PLAN, indent=2)
+    yield plain
+    yield json.dumps(PLAN, ensure_ascii=False, separators=(",", ":"))
+    yield "```json\n" + plain + "\n```"
+    yield "Here is the plan:\n```json\n" + plain + "\n```\nLet me know!"
+
+
+def stream_items(document, size):
+    extractor = JsonArrayItemExtractor(("milestones", "tasks"))
+    items = []
+    for start in range(0, len(document), size):
+        items.extend(extractor.feed(document[start:start + size]))
+    return extractor, items
+
+
+@pytest.mark.parametrize("document", list(plan_documents()))
+def test_array_items_match_the_full_document_at_every_chunk_size(document):
+    expected = [("milestones", item) for item in PLAN["milestones"]] + [("tasks", item) for item in PLAN["tasks"]]
+    for size in range(1, len(document) + 1):
+        extractor, items = stream_items(document, size)
+        assert items == expected, size
+        assert extractor.text == document
+
+
+def test_each_item_is_emitted_by_the_chunk_that_closes_it():
+    document = json.dumps({"tasks": [{"title": "A"}, {"title": "B"}]})
+    close = document.index("}") + 1
+    extractor = JsonArrayItemExtractor(("tasks",))
+    assert extractor.feed(document[:close - 1]) == []
+    assert extractor.feed(document[close - 1:close]) == [("tasks", {"title": "A"})]
+    assert extractor.feed(document[close:]) == [("tasks", {"title": "B"})]
+
+
+def test_only_objects_in_named_arrays_are_emitted():
+    document = json.dumps({
+        "notes": [{"title": "skip"}],
+        "tasks": ["not an object", 3, {"title": "keep", "subtasks": [{"title": "nested"}]}],
+    })
+    _, items = stream_items(document, 7)
+    assert items == [("tasks", {"title": "keep", "subtasks": [{"title": "nested"}]})]
+
+
+@pytest.mark.parametrize("text", [
+    '{"a": [1, 2]}',
+    '  {"a": [1, 2]}\n',
+    '```json\n{"a": [1, 2]}\n```',
+    '```\n{"a": [1, 2]}\n```',
+    '```json\n{"a": [1, 2]}```',
+    '```{"a": [1, 2]}```',
+])
+def test_loads_lenient_strips_fences(text):
+    assert loads_lenient(text) == {"a": [1, 2]}
+
+
+def test_loads_lenient_keeps_fences_inside_strings():
+    assert loads_lenient('```json\n{"code": "```py"}\n```') == {"code": "```py"}
+
+
+def test_loads_lenient_still_rejects_invalid_json():
+    with pytest.raises(json.JSONDecodeError):
+        loads_lenient("```json\n{\"a\": \n```")
@@ -0,0 +1,61 @@
+import types
+
+import pytest
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=100.0)
+    monkeypatch.setattr(ttl_cache, "time", types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_each_entry_expires_on_its_own_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=10)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=2)
+    clock.value += 3
+    assert cache.get("short") is None
+    assert "short" not in cache
+    assert cache.get("default") == 1
+    clock.value += 7
+    assert cache.get("default", "gone") == "gone"
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted_at_maxsize(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    # Re-setting an entry also makes it the most recently used
+    cache.set("a", 10)
+    cache.set("d", 4)
+    assert "c" not in cache
+    assert cache.get("a") == 10
+
+
+def test_invalidate_where_drops_only_matching_keys(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(("g1", "summary"), 1)
+    cache.set(("g1", "workload"), 2)
+    cache.set(("g2", "summary"), 3)
+    cache.invalidate_where(lambda key: key[0] == "g1")
+    assert len(cache) == 1
+    assert cache.get(("g2", "summary")) == 3
+
+
+def test_stats_count_hits_misses_and_expired_reads(clock):
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    clock.value += 5
+    cache.get("a")
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 2}
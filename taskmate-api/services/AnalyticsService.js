@@ -478,6 +478,107 @@ class AnalyticsService {
         }
     }
 
+    /**
+     * Get workload, expertise and capacity for many users in a single query
+     * @param {string} groupId - Group UUID (used when userIds is not provided)
+     * @param {string[]} userIds - Explicit list of user UUIDs (optional)
+     * @returns {Object} Per-member analytics, shaped like getUserAnalyticsSummary
+     */
+    async getTeamAnalyticsBatch(groupId, userIds = null) {
+        try {
+            if (!groupId && !(userIds && userIds.length)) {
+                throw new Error('Either groupId or userIds is required');
+            }
+
+            const params = [];
+            let membersQuery;
+            if (userIds && userIds.length) {
+                const placeholders = userIds.map((userId, i) => {
+                    params.push({ name: `uid${i}`, type: TYPES.UniqueIdentifier, value: userId });
+                    return `@uid${i}`;
+                });
+                membersQuery = `
+                    SELECT u.uid, u.username
+                    FROM dbo.Users u
+                    WHERE u.uid IN (${placeholders.join(', ')})
+                `;
+            } else {
+                params.push({ name: 'gid', type: TYPES.UniqueIdentifier, value: groupId });
+                membersQuery = `
+                    SELECT u.uid, u.username
+                    FROM dbo.Users u
+                    JOIN dbo.UserGroups ug ON u.uid = ug.uid
+                    WHERE ug.gid = @gid
+                `;
+            }
+
+            const query = `
+                WITH members AS (${membersQuery}),
+                workload AS (
+                    SELECT ta.uid, COUNT(*) as active_count
+                    FROM dbo.TaskAnalytics ta
+                    JOIN members m ON m.uid = ta.uid
+                    WHERE ta.success_status = 'pending'
+                    GROUP BY ta.uid
+                ),
+                capacity AS (
+                    SELECT um.uid, MAX(um.max_concurrent_tasks) as max_capacity
+                    FROM dbo.UserMetrics um
+                    JOIN members m ON m.uid = um.uid
+                    GROUP BY um.uid
+                )
+                SELECT 
+                    m.uid,
+                    m.username,
+                    w.active_count,
+                    c.max_capacity,
+                    ue.task_category,
+                    ue.expertise_score,
+                    ue.success_rate_percentage,
+                    ue.tasks_completed,
+                    ue.avg_completion_time_hours
+                FROM members m
+                LEFT JOIN workload w ON w.uid = m.uid
+                LEFT JOIN capacity c ON c.uid = m.uid
+                LEFT JOIN dbo.UserExpertise ue ON ue.uid = m.uid
+                ORDER BY m.username
+            `;
+
+            const results = await execReadCommand(query, params);
+
+            // One row per (member, category); fold them back into one entry per member
+            const members = new Map();
+            results.forEach(row => {
+                if (!members.has(row.uid)) {
+                    members.set(row.uid, {
+                        user_id: row.uid,
+                        username: row.username,
+                        current_workload: row.active_count || 0,
+                        expertise_by_category: {},
+                        historical_capacity: row.max_capacity || 3
+                    });
+                }
+                if (row.task_category) {
+                    members.get(row.uid).expertise_by_category[row.task_category] = {
+                        expertise_score: row.expertise_score || 0,
+                        success_rate_percentage: row.success_rate_percentage || 50,
+                        tasks_completed: row.tasks_completed || 0,
+                        avg_completion_time_hours: row.avg_completion_time_hours || 0
+                    };
+                }
+            });
+
+            return {
+                group_id: groupId || null,
+                members: Array.from(members.values()),
+                updated_at: new Date().toISOString()
+            };
+        } catch (error) {
+            console.error('Error getting team analytics batch:', error);
+            throw new Error(`Failed to get team analytics batch: ${error.message}`);
+        }
+    }
+
     /**
      * Get task completion trends for a user over time
      * @param {string} userId - User UUID
@@ -331,6 +331,51 @@ describe('AnalyticsService', () => {
         });
     });
 
+    describe('getTeamAnalyticsBatch', () => {
+        it('should fold per-category rows into one entry per member', async () => {
+            execReadCommand.mockResolvedValue([
+                { uid: 'user-1', username: 'john', active_count: 2, max_capacity: 5,
+                  task_category: 'frontend', expertise_score: 80, success_rate_percentage: 90,
+                  tasks_completed: 10, avg_completion_time_hours: 4 },
+                { uid: 'user-1', username: 'john', active_count: 2, max_capacity: 5,
+                  task_category: 'backend', expertise_score: 40, success_rate_percentage: 70,
+                  tasks_completed: 3, avg_completion_time_hours: 6 },
+                { uid: 'user-2', username: 'jane', active_count: null, max_capacity: null,
+                  task_category: null }
+            ]);
+
+            const result = await AnalyticsService.getTeamAnalyticsBatch('group-123');
+
+            expect(execReadCommand).toHaveBeenCalledTimes(1);
+            expect(result.group_id).toBe('group-123');
+            expect(result.members).toHaveLength(2);
+            expect(result.members[0].current_workload).toBe(2);
+            expect(Object.keys(result.members[0].expertise_by_category)).toEqual(['frontend', 'backend']);
+            expect(result.members[1]).toEqual({
+                user_id: 'user-2',
+                username: 'jane',
+                current_workload: 0,
+                expertise_by_category: {},
+                historical_capacity: 3
+            });
+        });
+
+        it('should filter by explicit user ids', async () => {
+            execReadCommand.mockResolvedValue([]);
+
+            await AnalyticsService.getTeamAnalyticsBatch(null, ['user-1', 'user-2']);
+
+            const [query, params] = execReadCommand.mock.calls[0];
+            expect(query).toContain('IN (@uid0, @uid1)');
+            expect(params.map(p => p.value)).toEqual(['user-1', 'user-2']);
+        });
+
+        it('should require a group or user ids', async () => {
+            await expect(AnalyticsService.getTeamAnalyticsBatch(null, []))
+                .rejects.toThrow('Either groupId or userIds is required');
+        });
+    });
+
     describe('getUserCompletionTrends', () => {
         it('should return user completion trends', async () => {
             const mockTrendsData = [